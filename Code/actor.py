@@ -1,12 +1,15 @@
 from __future__ import annotations
 import pygame
 import json
-from support import import_cut_graphics
+from animation import Animator, clip_library
 from constants import TILE_SIZE
+from spatial import CollisionGroup
 
 
 class Actor(pygame.sprite.Sprite):
-    def __init__(self, position: tuple, name: str, z: int, collision_sprites: pygame.sprite.Group,
+    dataCache: dict[str, dict] = {}
+
+    def __init__(self, position: tuple, name: str, z: int, collision_sprites: CollisionGroup,
                  *groups: pygame.sprite.Group):
         super().__init__(*groups)
         # Data
@@ -14,12 +17,11 @@ class Actor(pygame.sprite.Sprite):
         self.name = name
         self.load_data()
         # Assets
-        self.animations = {}
+        self.clips = {}
         self.import_assets()
-        self.frameIndex = 0
-        self.animationSpeed = 9
         self.status = "right_idle"
-        self.image = self.animations[self.status][self.frameIndex]
+        self.animator = Animator(self.clips[self.status])
+        self.image = self.animator.image
         # Movement
         self.rect = self.image.get_rect()
         self.position = pygame.math.Vector2(position)
@@ -32,45 +34,46 @@ class Actor(pygame.sprite.Sprite):
         self.collisionSprites = collision_sprites
 
     def load_data(self):
-        with open(f"../Data/Actors/{self.name}.json", "r") as data:
-            self.data = json.load(data)
+        # Actors of the same type share their parsed data
+        if self.name not in Actor.dataCache:
+            with open(f"../Data/Actors/{self.name}.json", "r") as data:
+                Actor.dataCache[self.name] = json.load(data)
+        self.data = Actor.dataCache[self.name]
 
     def import_assets(self):
-        self.animations = {"left_walk": [], "right_walk": [],
-                           "left_idle": [], "right_idle": []}
-
-        for animation in self.animations.keys():
-            full_path = f"{self.data['assets_path']}" + animation + ".png"
-            self.animations[animation] = import_cut_graphics(full_path, TILE_SIZE, TILE_SIZE * 2)
+        self.clips = clip_library.clips(self.data["assets_path"], (TILE_SIZE, TILE_SIZE * 2))
 
     def animate(self, dt: float):
-        self.frameIndex += self.animationSpeed * dt
-        if self.frameIndex >= len(self.animations[self.status]):
-            self.frameIndex = 0
-        self.image = self.animations[self.status][int(self.frameIndex)]
+        self.animator.play(self.clips[self.status])
+        self.animator.advance(dt)
+        self.image = self.animator.image
 
     def set_status(self):
         if self.direction.magnitude() == 0 and not ("idle" in self.status):
             self.status = self.status.split("_")[0] + "_idle"
 
     def collision(self, direction: str):
-        for sprite in self.collisionSprites.sprites():
-            sprite: Actor
-            if sprite.hitbox.colliderect(self.hitbox):
-                if direction == "horizontal":
-                    if self.direction.x > 0:
-                        self.hitbox.right = sprite.hitbox.left
-                    if self.direction.x < 0:
-                        self.hitbox.left = sprite.hitbox.right
-                    self.rect.midbottom = self.hitbox.midbottom
-                    self.position.x = self.rect.centerx
-                if direction == "vertical":
-                    if self.direction.y > 0:
-                        self.hitbox.bottom = sprite.hitbox.top
-                    if self.direction.y < 0:
-                        self.hitbox.top = sprite.hitbox.bottom
-                    self.rect.midbottom = self.hitbox.midbottom
-                    self.position.y = self.rect.centery
+        # Same resolution as walking every collision sprite in group order, but only nearby ones are tested
+        serial = -1
+        while True:
+            collision = self.collisionSprites.next_collision(self.hitbox, serial)
+            if collision is None:
+                break
+            serial, box = collision
+            if direction == "horizontal":
+                if self.direction.x > 0:
+                    self.hitbox.right = box.left
+                if self.direction.x < 0:
+                    self.hitbox.left = box.right
+                self.rect.midbottom = self.hitbox.midbottom
+                self.position.x = self.rect.centerx
+            if direction == "vertical":
+                if self.direction.y > 0:
+                    self.hitbox.bottom = box.top
+                if self.direction.y < 0:
+                    self.hitbox.top = box.bottom
+                self.rect.midbottom = self.hitbox.midbottom
+                self.position.y = self.rect.centery
 
     def move(self, dt: float):
         # Normalizing direction vector
@@ -89,5 +92,10 @@ class Actor(pygame.sprite.Sprite):
         self.hitbox.midbottom = self.rect.midbottom
         self.collision("vertical")
 
+        # Keep the broadphase of any collision group this actor is part of in sync
+        for group in self.groups():
+            if isinstance(group, CollisionGroup):
+                group.refresh(self)
+
     def update(self, dt: float):
         ...
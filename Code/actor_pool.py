@@ -0,0 +1,193 @@
+from __future__ import annotations
+import pygame
+import numpy as np
+from typing import Iterable, Optional
+from constants import TILE_SIZE
+
+# Side of the cells static geometry is rasterised into
+POOL_CELL_SIZE = TILE_SIZE // 2
+
+
+class ActorPool:
+    """
+    Struct of arrays storage for crowds of actors. Positions, directions, speeds and hitbox sizes live in
+    contiguous NumPy arrays and are integrated for every actor at once. Static geometry is rasterised into a
+    grid of blocked cells, so collisions are resolved with one vectorised lookup per axis.
+    Sprites are only written back by sync, for the actors that are actually drawn.
+    """
+
+    def __init__(self, capacity: int = 128, cell_size: int = POOL_CELL_SIZE):
+        self.cellSize = cell_size
+        self.count = 0
+        self.position = np.zeros((capacity, 2))
+        self.direction = np.zeros((capacity, 2))
+        self.speed = np.zeros(capacity)
+        # Rect and hitbox sizes, the hitbox sits at the bottom middle of the rect like in Actor
+        self.rectSize = np.zeros((capacity, 2))
+        self.hitboxSize = np.zeros((capacity, 2))
+        self.sprites: list[Optional[pygame.sprite.Sprite]] = [None] * capacity
+        self.blocked = np.zeros((0, 0), dtype=bool)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def reserve(self, capacity: int):
+        if capacity <= len(self.speed):
+            return
+        capacity = max(capacity, len(self.speed) * 2)
+        for name in ("position", "direction", "speed", "rectSize", "hitboxSize"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:])
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.sprites.extend([None] * (capacity - len(self.sprites)))
+
+    def spawn(self, positions, rect_size: tuple, hitbox_size: tuple, speed: float,
+              directions=None) -> range:
+        """
+        Add actors without sprites, returns their indices.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        amount = len(positions)
+        self.reserve(self.count + amount)
+        indices = slice(self.count, self.count + amount)
+        self.position[indices] = positions
+        self.direction[indices] = 0 if directions is None else np.asarray(directions, dtype=float).reshape(-1, 2)
+        self.speed[indices] = speed
+        self.rectSize[indices] = rect_size
+        self.hitboxSize[indices] = hitbox_size
+        self.count += amount
+        return range(indices.start, indices.stop)
+
+    def add(self, actor: pygame.sprite.Sprite) -> int:
+        """
+        Move an Actor's movement state into the pool.
+        """
+        index = self.spawn(actor.position, actor.rect.size, actor.hitbox.size, actor.baseSpeed, actor.direction)[0]
+        self.sprites[index] = actor
+        actor.poolIndex = index
+        return index
+
+    def remove(self, index: int):
+        """
+        Remove an actor by swapping the last one into its slot.
+        """
+        last = self.count - 1
+        for array in (self.position, self.direction, self.speed, self.rectSize, self.hitboxSize):
+            array[index] = array[last]
+        self.sprites[index] = self.sprites[last]
+        self.sprites[last] = None
+        if self.sprites[index] is not None:
+            self.sprites[index].poolIndex = index
+        self.count -= 1
+
+    def set_static_geometry(self, rects: Iterable[pygame.Rect], size: tuple[int, int]):
+        """
+        Rasterise static hitboxes into the blocked grid. Any cell a hitbox touches is blocked, which is
+        exact for tile aligned geometry and slightly conservative for everything else.
+        """
+        cell = self.cellSize
+        self.blocked = np.zeros((-(-size[1] // cell), -(-size[0] // cell)), dtype=bool)
+        rows, columns = self.blocked.shape
+        for rect in rects:
+            left, top = max(0, rect.left // cell), max(0, rect.top // cell)
+            right, bottom = min(columns, -(-rect.right // cell)), min(rows, -(-rect.bottom // cell))
+            self.blocked[top:bottom, left:right] = True
+
+    def hitboxes(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Left, top, right and bottom of every hitbox. Positions are rounded first, the way Actor places its rect.
+        """
+        n = self.count
+        # np.round rounds halves to even like round does for Actor
+        position = np.round(self.position[:n])
+        half_width = self.hitboxSize[:n, 0] / 2
+        bottom = position[:, 1] + self.rectSize[:n, 1] / 2
+        return position[:, 0] - half_width, bottom - self.hitboxSize[:n, 1], position[:, 0] + half_width, bottom
+
+    def edge_blocked(self, edge: np.ndarray, start: np.ndarray, end: np.ndarray, vertical: bool) -> np.ndarray:
+        """
+        Whether any cell along an edge, from start to end across it, is blocked.
+        """
+        rows, columns = self.blocked.shape
+        cell = self.cellSize
+        edge_cells = np.floor(edge / cell).astype(int)
+        first = np.floor(start / cell).astype(int)
+        last = np.floor((end - 1) / cell).astype(int)
+        samples = int((last - first).max(initial=0)) + 1
+        across = np.minimum(first[:, None] + np.arange(samples)[None, :], last[:, None])
+        along = np.broadcast_to(edge_cells[:, None], across.shape)
+        row, column = (along, across) if vertical else (across, along)
+        inside = (row >= 0) & (row < rows) & (column >= 0) & (column < columns)
+        hits = np.zeros(across.shape, dtype=bool)
+        hits[inside] = self.blocked[row[inside], column[inside]]
+        return hits.any(axis=1)
+
+    def step(self, dt: float):
+        n = self.count
+        if not n:
+            return
+        direction = self.direction[:n]
+        magnitude = np.hypot(direction[:, 0], direction[:, 1])
+        moving = magnitude > 0
+        direction[moving] /= magnitude[moving, None]
+        velocity = direction * (self.speed[:n, None] * dt)
+        cell = self.cellSize
+        half_width = self.hitboxSize[:n, 0] / 2
+        has_geometry = self.blocked.size > 0
+
+        # Horizontal movement
+        self.position[:n, 0] += velocity[:, 0]
+        if has_geometry:
+            left, top, right, bottom = self.hitboxes()
+            going_right = velocity[:, 0] > 0
+            going_left = velocity[:, 0] < 0
+            leading = np.where(going_right, right - 1, left)
+            hit = (going_right | going_left) & self.edge_blocked(leading, top, bottom, False)
+            wall = np.floor(leading / cell) * cell
+            snap_right = hit & going_right
+            snap_left = hit & going_left
+            self.position[:n, 0][snap_right] = wall[snap_right] - half_width[snap_right]
+            self.position[:n, 0][snap_left] = wall[snap_left] + cell + half_width[snap_left]
+
+        # Vertical movement
+        self.position[:n, 1] += velocity[:, 1]
+        if has_geometry:
+            left, top, right, bottom = self.hitboxes()
+            going_down = velocity[:, 1] > 0
+            going_up = velocity[:, 1] < 0
+            leading = np.where(going_down, bottom - 1, top)
+            hit = (going_down | going_up) & self.edge_blocked(leading, left, right, True)
+            wall = np.floor(leading / cell) * cell
+            to_bottom = self.rectSize[:n, 1] / 2
+            to_top = self.hitboxSize[:n, 1] - to_bottom
+            snap_down = hit & going_down
+            snap_up = hit & going_up
+            self.position[:n, 1][snap_down] = wall[snap_down] - to_bottom[snap_down]
+            self.position[:n, 1][snap_up] = wall[snap_up] + cell + to_top[snap_up]
+
+    def sync(self, viewport: Optional[pygame.Rect] = None) -> int:
+        """
+        Write positions back to the sprites of the actors inside the viewport, returns how many were synced.
+        """
+        n = self.count
+        position = self.position[:n]
+        if viewport is None:
+            indices = np.arange(n)
+        else:
+            half = self.rectSize[:n] / 2
+            visible = ((position[:, 0] + half[:, 0] >= viewport.left) & (position[:, 0] - half[:, 0] < viewport.right) &
+                       (position[:, 1] + half[:, 1] >= viewport.top) & (position[:, 1] - half[:, 1] < viewport.bottom))
+            indices = np.flatnonzero(visible)
+        synced = 0
+        for index in indices.tolist():
+            sprite = self.sprites[index]
+            if sprite is None:
+                continue
+            x, y = position[index]
+            sprite.position.update(x, y)
+            sprite.direction.update(*self.direction[index])
+            sprite.rect.center = (round(x), round(y))
+            sprite.hitbox.midbottom = sprite.rect.midbottom
+            synced += 1
+        return synced
@@ -0,0 +1,86 @@
+from __future__ import annotations
+import pygame
+from os.path import exists
+from typing import Optional
+from constants import TILE_SIZE
+from assets import asset_cache
+
+# Frames per second of actor animations
+ANIMATION_FPS = 9
+# Animations with a sheet per actor, the left facing ones are mirrored from these when an actor has no left sheet
+ACTOR_ANIMATIONS = ("right_walk", "right_idle")
+
+
+class AnimationClip:
+    """
+    Immutable sequence of frames shared by every actor that plays it.
+    """
+    __slots__ = ("name", "frames", "fps")
+
+    def __init__(self, name: str, frames: tuple, fps: float = ANIMATION_FPS):
+        self.name = name
+        self.frames = frames
+        self.fps = fps
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def mirrored(self, name: str) -> AnimationClip:
+        return AnimationClip(name, tuple(pygame.transform.flip(frame, True, False) for frame in self.frames), self.fps)
+
+
+class Animator:
+    """
+    Per actor animation state: the clip being played and how far into it the actor is.
+    """
+    __slots__ = ("clip", "time")
+
+    def __init__(self, clip: AnimationClip):
+        self.clip = clip
+        self.time = 0.0
+
+    def play(self, clip: AnimationClip):
+        # The time cursor carries over, like the frame index did when only the status changed
+        self.clip = clip
+
+    def advance(self, dt: float):
+        self.time += dt
+        if self.time * self.clip.fps >= len(self.clip):
+            self.time = 0.0
+
+    @property
+    def image(self) -> pygame.Surface:
+        return self.clip.frames[min(int(self.time * self.clip.fps), len(self.clip) - 1)]
+
+
+class ClipLibrary:
+    """
+    Loads the clips of an actor type once per assets path. Left facing clips come from their own sheet,
+    which is not always an exact mirror of the right one, and are only flipped from the right frames when
+    an actor ships no left sheet.
+    """
+
+    def __init__(self, fps: float = ANIMATION_FPS):
+        self.fps = fps
+        self.sets: dict[str, dict[str, AnimationClip]] = {}
+
+    def clips(self, assets_path: str, frame_size: Optional[tuple] = None) -> dict[str, AnimationClip]:
+        clips = self.sets.get(assets_path)
+        if clips is None:
+            width, height = frame_size or (TILE_SIZE, TILE_SIZE * 2)
+            clips = {}
+            for name in ACTOR_ANIMATIONS:
+                frames = tuple(asset_cache.frames(f"{assets_path}{name}.png", width, height))
+                clips[name] = AnimationClip(name, frames, self.fps)
+                left_name = name.replace("right", "left")
+                left_path = f"{assets_path}{left_name}.png"
+                if exists(left_path):
+                    clips[left_name] = AnimationClip(left_name, tuple(asset_cache.frames(left_path, width, height)),
+                                                     self.fps)
+                else:
+                    clips[left_name] = clips[name].mirrored(left_name)
+            self.sets[assets_path] = clips
+        return clips
+
+
+clip_library = ClipLibrary()
@@ -0,0 +1,198 @@
+from __future__ import annotations
+import pygame
+import json
+from collections import OrderedDict
+from os.path import exists, getmtime, normpath
+from time import perf_counter
+from typing import Callable, Optional
+
+# Default budget of the process wide cache, in bytes of decoded pixels
+ASSET_CACHE_BYTES = 128 * 1024 * 1024
+# Default font and how many rendered strings are kept
+FONT_PATH = "../Assets/Fonts/monogram.ttf"
+TEXT_CACHE_ENTRIES = 256
+# Atlases baked by bake_atlas.py
+ATLAS_PATH = "../Assets/Atlas"
+MANIFEST_PATH = f"{ATLAS_PATH}/manifest.json"
+
+
+def surface_bytes(surface: pygame.Surface) -> int:
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+class AssetCache:
+    """
+    Process wide cache of converted surfaces, keyed by path, frame size and pixel format.
+    Entries are evicted least recently used first once the cache grows over its byte budget.
+    Returned surfaces are shared, callers must copy them before drawing on them.
+    Images baked into an atlas are subsurfaces of the atlas, which is loaded and converted once.
+    """
+
+    def __init__(self, max_bytes: int = ASSET_CACHE_BYTES, manifest_path: str = MANIFEST_PATH):
+        self.maxBytes = max_bytes
+        self.manifestPath = manifest_path
+        self.manifest: Optional[dict] = None
+        self.entries: OrderedDict[tuple, tuple[object, int]] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # Milliseconds spent decoding and converting image files
+        self.loadTime = 0.0
+
+    def get(self, key: tuple, build: Callable[[], object], size: Callable[[object], int]):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+
+        self.misses += 1
+        value = build()
+        value_size = size(value)
+        self.entries[key] = (value, value_size)
+        self.size += value_size
+        # Always keep the newest entry, even when it is bigger than the whole budget
+        while self.size > self.maxBytes and len(self.entries) > 1:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+        return value
+
+    def atlas_entry(self, path: str) -> Optional[dict]:
+        """
+        Manifest entry of an image, unless it was not baked or changed since.
+        """
+        if self.manifest is None:
+            self.manifest = {}
+            if exists(self.manifestPath):
+                with open(self.manifestPath, "r") as manifest:
+                    self.manifest = json.load(manifest)
+        entry = self.manifest.get("images", {}).get(path)
+        if entry is None or not exists(path) or getmtime(path) != entry["mtime"]:
+            return None
+        return entry
+
+    def atlas(self, index: int) -> pygame.Surface:
+        path = normpath(f"{ATLAS_PATH}/{self.manifest['atlases'][index]}")
+        def load() -> pygame.Surface:
+            start = perf_counter()
+            atlas = pygame.image.load(path).convert_alpha()
+            self.loadTime += (perf_counter() - start) * 1000
+            return atlas
+
+        return self.get((path, None, "alpha"), load, surface_bytes)
+
+    def cached(self, path: str, alpha: bool = True) -> bool:
+        return (normpath(path), None, "alpha" if alpha else "opaque") in self.entries
+
+    def image(self, path: str, alpha: bool = True, decoded: Optional[pygame.Surface] = None) -> pygame.Surface:
+        """
+        A decoded and converted image. An image already decoded off the main thread can be passed in,
+        only its conversion is then left.
+        """
+        path = normpath(path)
+        entry = self.atlas_entry(path) if alpha else None
+
+        def load() -> pygame.Surface:
+            if entry is not None:
+                return self.atlas(entry["atlas"]).subsurface(entry["rect"])
+            start = perf_counter()
+            image = decoded if decoded is not None else pygame.image.load(path)
+            image = image.convert_alpha() if alpha else image.convert()
+            self.loadTime += (perf_counter() - start) * 1000
+            return image
+
+        # Atlas subsurfaces share the atlas pixels, which are already accounted for
+        return self.get((path, None, "alpha" if alpha else "opaque"), load,
+                        lambda image: 0 if entry is not None else surface_bytes(image))
+
+    def frames(self, path: str, frame_width: int, frame_height: int, row: Optional[int] = None) -> list:
+        """
+        The frames of a sprite sheet cut left to right, top to bottom. With a row, only that row's frames.
+        """
+        path = normpath(path)
+        entry = self.atlas_entry(path)
+        baked = entry["frames"].get(f"{frame_width}x{frame_height}") if entry is not None else None
+
+        def cut() -> list:
+            if baked is not None:
+                atlas = self.atlas(entry["atlas"])
+                return [atlas.subsurface(rect) for rect in baked]
+            image = self.image(path)
+            cut_images = []
+            for y in range(image.get_height() // frame_height):
+                for x in range(image.get_width() // frame_width):
+                    frame = pygame.Surface((frame_width, frame_height))
+                    frame.set_colorkey(0)
+                    frame = frame.convert_alpha()
+                    frame.blit(image, (0, 0),
+                               pygame.Rect(x * frame_width, y * frame_height, frame_width, frame_height))
+                    cut_images.append(frame)
+            return cut_images
+
+        frames = self.get((path, (frame_width, frame_height), "alpha"), cut,
+                          lambda cut_images: 0 if baked is not None else
+                          sum(surface_bytes(frame) for frame in cut_images))
+        if row is None:
+            return list(frames)
+        columns = (entry["rect"][2] if entry is not None else self.image(path).get_width()) // frame_width
+        return frames[row * columns:(row + 1) * columns]
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "bytes": self.size, "hits": self.hits, "misses": self.misses,
+                "load_ms": self.loadTime}
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+        self.manifest = None
+
+
+class TextCache:
+    """
+    Shared font registry plus a cache of rendered text surfaces keyed by font, size, string and colour.
+    The least recently used surfaces are dropped once the cache holds more than max_entries strings.
+    """
+
+    def __init__(self, max_entries: int = TEXT_CACHE_ENTRIES):
+        self.maxEntries = max_entries
+        self.fonts: dict[tuple[str, int], pygame.font.Font] = {}
+        self.entries: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Milliseconds spent loading fonts and rendering text
+        self.fontTime = 0.0
+        self.renderTime = 0.0
+
+    def font(self, size: int, path: str = FONT_PATH) -> pygame.font.Font:
+        key = (normpath(path), size)
+        if key not in self.fonts:
+            start = perf_counter()
+            self.fonts[key] = pygame.font.Font(key[0], size)
+            self.fontTime += (perf_counter() - start) * 1000
+        return self.fonts[key]
+
+    def render(self, text: str, size: int, color, path: str = FONT_PATH, antialias: bool = False) -> pygame.Surface:
+        key = (normpath(path), size, text, str(color), antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        font = self.font(size, path)
+        start = perf_counter()
+        surface = font.render(text, antialias, color)
+        self.renderTime += (perf_counter() - start) * 1000
+        self.entries[key] = surface
+        if len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+        return surface
+
+    def stats(self) -> dict:
+        return {"fonts": len(self.fonts), "entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "font_ms": self.fontTime, "render_ms": self.renderTime}
+
+
+asset_cache = AssetCache()
+text_cache = TextCache()
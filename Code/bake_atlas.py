@@ -0,0 +1,96 @@
+"""
+Packs the loose sprite images into texture atlases with a json manifest of image and frame rects,
+which AssetCache hands out as subsurfaces of the converted atlases. Run from the Code directory.
+
+python bake_atlas.py
+"""
+import pygame
+import json
+from glob import glob
+from os.path import exists, getmtime, normpath
+from typing import Optional
+from assets import ATLAS_PATH, MANIFEST_PATH
+from animation import ACTOR_ANIMATIONS
+from constants import TILE_SIZE
+
+ATLAS_SIZE = 2048
+
+
+def atlas_sources() -> dict[str, Optional[tuple[int, int]]]:
+    """
+    Images to bake, with the frame size they are cut in when they are sprite sheets.
+    """
+    sources: dict[str, Optional[tuple[int, int]]] = {}
+    for actor_path in sorted(glob("../Assets/Actors/*/")):
+        for name in ACTOR_ANIMATIONS:
+            sources[f"{actor_path}{name}.png"] = (TILE_SIZE, TILE_SIZE * 2)
+            # Actors that ship their own left sheets load them instead of mirroring the right ones
+            left_path = f"{actor_path}{name.replace('right', 'left')}.png"
+            if exists(left_path):
+                sources[left_path] = (TILE_SIZE, TILE_SIZE * 2)
+    with open("../Data/Buttons/buttons.json", "r") as data:
+        buttons = json.load(data)
+    sources[buttons["sprite_sheet_path"]] = (buttons["width"], buttons["height"])
+    for path in sorted(glob("../Assets/Scenes/CableScene/*.png") + glob("../Assets/Overlay/*.png")):
+        sources[path] = None
+    return {normpath(path): frame_size for path, frame_size in sources.items()}
+
+
+def pack_pages(images: dict[str, pygame.Surface], size: int = ATLAS_SIZE) -> list[dict[str, tuple]]:
+    """
+    Shelf pack images, tallest first, into as many size x size pages as needed.
+    """
+    pages = [{}]
+    x = y = shelf = 0
+    for path, image in sorted(images.items(), key=lambda item: -item[1].get_height()):
+        width, height = image.get_size()
+        if x + width > size:
+            x = 0
+            y += shelf
+            shelf = 0
+        if y + height > size and pages[-1]:
+            pages.append({})
+            x = y = shelf = 0
+        pages[-1][path] = (x, y, width, height)
+        x += width
+        shelf = max(shelf, height)
+    return pages
+
+
+def frame_rects(rect: tuple, frame_size: tuple[int, int]) -> list[tuple]:
+    x, y, width, height = rect
+    frame_width, frame_height = frame_size
+    return [(x + column * frame_width, y + row * frame_height, frame_width, frame_height)
+            for row in range(height // frame_height) for column in range(width // frame_width)]
+
+
+def bake() -> dict:
+    sources = atlas_sources()
+    images = {path: pygame.image.load(path) for path in sources}
+    manifest = {"atlases": [], "images": {}}
+    for index, page in enumerate(pack_pages(images)):
+        width = max(x + w for x, _, w, _ in page.values())
+        height = max(y + h for _, y, _, h in page.values())
+        atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+        for path, rect in page.items():
+            atlas.blit(images[path], rect[:2])
+            entry = {"atlas": index, "rect": rect, "mtime": getmtime(path), "frames": {}}
+            if sources[path]:
+                frame_width, frame_height = sources[path]
+                entry["frames"][f"{frame_width}x{frame_height}"] = frame_rects(rect, sources[path])
+            manifest["images"][path] = entry
+        atlas_file = f"atlas_{index}.png"
+        pygame.image.save(atlas, f"{ATLAS_PATH}/{atlas_file}")
+        manifest["atlases"].append(atlas_file)
+    with open(MANIFEST_PATH, "w") as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+if __name__ == '__main__':
+    import os
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    os.makedirs(ATLAS_PATH, exist_ok=True)
+    baked = bake()
+    print(f"{len(baked['images'])} images in {len(baked['atlases'])} atlases, manifest at {MANIFEST_PATH}")
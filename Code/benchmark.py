@@ -0,0 +1,644 @@
+"""
+Headless engine benchmarks, run from the Code directory.
+
+python benchmark.py                 synthetic scene suite, results as json
+python benchmark.py --micro         render, collision, map load, tile storage, crowd and navigation micro benchmarks
+python benchmark.py --soak          walk across a huge streamed map, memory and frame times over time
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from array import array
+from time import perf_counter
+from constants import TILE_SIZE
+from sprites import Generic, Tile
+from scene import CameraGroup, SceneManager
+from actor import Actor
+from spatial import CollisionGroup
+from pytmx import load_pygame
+from mapbundle import MapBundle, compile_all, bundle_path, write_bundle, encode_atlas
+from actor_pool import ActorPool
+from save import SaveManager
+from tiles import TileLayer
+from navigation import NavGrid
+
+LAYERS = {
+    "Floor": {"index": 0, "collision": False},
+    "main": {"index": 1, "collision": False},
+    "Top": {"index": 2, "collision": False}
+}
+
+
+def legacy_custom_draw(group: CameraGroup, player: Generic):
+    """
+    The per frame sort and blit CameraGroup used before the render queue, kept as a reference.
+    """
+    group.offset.x = player.rect.centerx - group.width / 2
+    group.offset.y = player.rect.centery - group.height / 2
+    for layer in [value["index"] for value in group.layers.values()]:
+        for sprite in sorted(group.sprites(), key=lambda l: l.rect.centery):
+            if sprite.z == layer:
+                offset_rect = sprite.rect.copy()
+                offset_rect.center -= group.offset
+                group.display.blit(sprite.image, offset_rect)
+
+
+class Mover(Generic):
+    def update(self, dt: float):
+        self.rect.y += random.randint(-4, 4)
+
+
+def populate(group: CameraGroup, count: int, moving: int) -> list:
+    surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    side = max(1, int(count ** 0.5))
+    for i in range(count):
+        position = ((i % side) * TILE_SIZE, (i // side) * TILE_SIZE)
+        Generic(position, surface, random.choice(list(LAYERS.values()))["index"], group)
+    movers = []
+    for i in range(moving):
+        mover = Mover((random.randint(0, side * TILE_SIZE), random.randint(0, side * TILE_SIZE)), surface,
+                      LAYERS["main"]["index"], group)
+        movers.append(mover)
+    return movers
+
+
+def bench_render(counts: list, frames: int = 60, moving: int = 20):
+    display = pygame.display.set_mode((1280, 720))
+    print(f"{'sprites':>8} {'legacy ms':>10} {'camera ms':>10}")
+    for count in counts:
+        random.seed(count)
+        group = CameraGroup(display, LAYERS)
+        movers = populate(group, count, moving)
+        player = movers[0]
+
+        start = perf_counter()
+        for _ in range(frames):
+            group.update(0)
+            legacy_custom_draw(group, player)
+        legacy = (perf_counter() - start) / frames * 1000
+
+        start = perf_counter()
+        for _ in range(frames):
+            group.update(0)
+            group.custom_draw(player)
+        camera = (perf_counter() - start) / frames * 1000
+
+        print(f"{count:>8} {legacy:>10.2f} {camera:>10.2f}")
+
+
+class LegacyActor(Actor):
+    """
+    Actor resolving collisions with the linear walk over every collision sprite used before the broadphase.
+    """
+
+    def collision(self, direction: str):
+        for sprite in self.collisionSprites.sprites():
+            if sprite.hitbox.colliderect(self.hitbox):
+                if direction == "horizontal":
+                    if self.direction.x > 0:
+                        self.hitbox.right = sprite.hitbox.left
+                    if self.direction.x < 0:
+                        self.hitbox.left = sprite.hitbox.right
+                    self.rect.midbottom = self.hitbox.midbottom
+                    self.position.x = self.rect.centerx
+                if direction == "vertical":
+                    if self.direction.y > 0:
+                        self.hitbox.bottom = sprite.hitbox.top
+                    if self.direction.y < 0:
+                        self.hitbox.top = sprite.hitbox.bottom
+                    self.rect.midbottom = self.hitbox.midbottom
+                    self.position.y = self.rect.centery
+
+
+def walk(actor: Actor, steps: int, seed: int) -> float:
+    rng = random.Random(seed)
+    start = perf_counter()
+    for _ in range(steps):
+        actor.direction.update(rng.choice((-1, 0, 1)), rng.choice((-1, 0, 1)))
+        actor.move(1 / 60)
+    return perf_counter() - start
+
+
+def bench_collision(counts: list, steps: int = 600):
+    pygame.display.set_mode((1280, 720))
+    surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    print(f"{'colliders':>10} {'linear ms':>10} {'hash ms':>10} {'same result':>12}")
+    for count in counts:
+        random.seed(count)
+        side = int(count ** 0.5) * 2
+        cells = random.sample(range(side * side), count)
+        legacy_group = pygame.sprite.Group()
+        hashed_group = CollisionGroup("hitbox")
+        for cell in cells:
+            Tile(surface, ((cell % side) * TILE_SIZE, (cell // side) * TILE_SIZE), 1, legacy_group, hashed_group)
+
+        start = ((side // 2) * TILE_SIZE, (side // 2) * TILE_SIZE)
+        legacy = LegacyActor(start, "player", 1, legacy_group)
+        hashed = Actor(start, "player", 1, hashed_group)
+        legacy_time = walk(legacy, steps, count) / steps * 1000
+        hashed_time = walk(hashed, steps, count) / steps * 1000
+        same = legacy.hitbox == hashed.hitbox and legacy.position == hashed.position
+        print(f"{count:>10} {legacy_time:>10.3f} {hashed_time:>10.3f} {str(same):>12}")
+
+
+def bench_map_load(repeats: int = 5):
+    """
+    Cold load of every compiled scene from its tmx against its map bundle.
+    """
+    pygame.display.set_mode((1280, 720))
+    print(f"{'scene':>12} {'tmx ms':>10} {'bundle ms':>10}")
+    for name, (path, _, _) in compile_all().items():
+        with open(f"../Data/Scenes/{name}.json", "r") as data:
+            tmx_path = json.load(data)["tmx_path"]
+        start = perf_counter()
+        for _ in range(repeats):
+            load_pygame(tmx_path)
+        tmx_time = (perf_counter() - start) / repeats * 1000
+
+        start = perf_counter()
+        for _ in range(repeats):
+            with MapBundle(path) as bundle:
+                bundle.load_images()
+        bundle_time = (perf_counter() - start) / repeats * 1000
+        print(f"{name:>12} {tmx_time:>10.2f} {bundle_time:>10.2f}")
+
+
+def bench_tile_storage(sides: list, queries: int = 10000):
+    """
+    Memory and collision lookups of a full collision layer stored as Tile sprites against a TileLayer.
+    """
+    pygame.display.set_mode((1280, 720))
+    surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    rng = random.Random(0)
+    print(f"{'tiles':>8} {'sprites MB':>11} {'layer MB':>9} {'sprites us':>11} {'layer us':>9}")
+    for side in sides:
+        probes = [pygame.Rect(rng.randrange(side * TILE_SIZE), rng.randrange(side * TILE_SIZE), 40, 16)
+                  for _ in range(queries)]
+
+        tracemalloc.start()
+        draw_group = pygame.sprite.Group()
+        sprite_group = CollisionGroup("hitbox")
+        for y in range(side):
+            for x in range(side):
+                Tile(surface, (x * TILE_SIZE, y * TILE_SIZE), 1, draw_group, sprite_group)
+        sprite_group.flush()
+        sprite_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        start = perf_counter()
+        for probe in probes:
+            sprite_group.next_collision(probe)
+        sprite_time = (perf_counter() - start) / queries * 1e6
+        del draw_group, sprite_group
+
+        tracemalloc.start()
+        layer = TileLayer("Walls", side, side, 1)
+        for y in range(side):
+            for x in range(side):
+                layer.set(x, y, 1, surface)
+        layer_group = CollisionGroup("hitbox")
+        layer_group.add_layer(layer)
+        layer_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        start = perf_counter()
+        for probe in probes:
+            layer_group.next_collision(probe)
+        layer_time = (perf_counter() - start) / queries * 1e6
+        print(f"{side * side:>8} {sprite_bytes / 2 ** 20:>11.2f} {layer_bytes / 2 ** 20:>9.2f} "
+              f"{sprite_time:>11.2f} {layer_time:>9.2f}")
+
+
+def bench_crowd(counts: list, steps: int = 120, walls: int = 2000):
+    """
+    NPC movement with one Actor per NPC against the vectorised ActorPool, on the same random walls.
+    Where both run, the pool has to end with the same positions as the actors for its timings to count.
+    """
+    pygame.display.set_mode((1280, 720))
+    surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    rng = random.Random(0)
+    side = int(walls ** 0.5) * 3
+    wall_group = CollisionGroup("hitbox")
+    for cell in rng.sample(range(side * side), walls):
+        Tile(surface, ((cell % side) * TILE_SIZE, (cell // side) * TILE_SIZE), 1, wall_group)
+    world = (side * TILE_SIZE, side * TILE_SIZE)
+    viewport = pygame.Rect(0, 0, 1280, 720)
+    print(f"{'npcs':>8} {'actors ms':>10} {'pool ms':>10} {'sync ms':>10} {'same result':>12}")
+    for count in counts:
+        positions = []
+        probe = Actor((0, 0), "player", 1, wall_group)
+        # Start clear of the walls, an actor spawned inside one is pushed out differently than by the pool
+        while len(positions) < count:
+            probe.rect.center = rng.randrange(world[0]), rng.randrange(world[1])
+            probe.hitbox.midbottom = probe.rect.midbottom
+            if wall_group.next_collision(probe.hitbox) is None:
+                positions.append(probe.rect.center)
+        directions = [(rng.choice((-1, 0, 1)), rng.choice((-1, 0, 1))) for _ in range(count)]
+
+        # One sprite per NPC, too slow to be worth timing past a few thousand
+        actor_time = float("nan")
+        if count <= 2500:
+            actors = [Actor(position, "player", 1, wall_group) for position in positions]
+            for actor, direction in zip(actors, directions):
+                actor.direction.update(direction)
+                actor.rect.center = actor.position
+                actor.hitbox.midbottom = actor.rect.midbottom
+            start = perf_counter()
+            for _ in range(steps):
+                for actor in actors:
+                    actor.move(1 / 60)
+            actor_time = (perf_counter() - start) / steps * 1000
+            template = actors[0]
+        else:
+            actors = []
+            template = probe
+
+        pool = ActorPool(count)
+        pool.set_static_geometry((sprite.hitbox for sprite in wall_group), world)
+        pool.spawn(positions, template.rect.size, template.hitbox.size, template.baseSpeed, directions)
+        # Only the NPCs that could be on screen carry a sprite
+        for index in range(min(count, 100)):
+            pool.sprites[index] = Actor(positions[index], "player", 1, wall_group)
+        start = perf_counter()
+        for _ in range(steps):
+            pool.step(1 / 60)
+        pool_time = (perf_counter() - start) / steps * 1000
+        start = perf_counter()
+        for _ in range(steps):
+            pool.sync(viewport)
+        sync_time = (perf_counter() - start) / steps * 1000
+        same = "-"
+        if actors:
+            same = str(all(abs(actor.position.x - x) < 1e-6 and abs(actor.position.y - y) < 1e-6
+                           for actor, (x, y) in zip(actors, pool.position[:count].tolist())))
+        print(f"{count:>8} {actor_time:>10.3f} {pool_time:>10.3f} {sync_time:>10.3f} {same:>12}")
+
+
+def bench_navigation(counts: list, side: int = 128, walls: int = 3000):
+    """
+    NPCs heading to one door, an A* search each against following one shared flow field, and the cost of
+    repairing the field after a wall is added against building it again.
+    """
+    pygame.display.set_mode((1280, 720))
+    surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    rng = random.Random(0)
+    layer = TileLayer("Walls", side, side, 1)
+    # The corner the door is in is kept clear so it cannot be walled in
+    for cell in rng.sample([cell for cell in range(side * side) if cell % side > 2 or cell // side > 2], walls):
+        layer.set(cell % side, cell // side, 1, surface)
+    wall_group = CollisionGroup("hitbox")
+    wall_group.add_layer(layer)
+    grid = NavGrid(wall_group, side, side)
+    door = pygame.Rect(0, 0, TILE_SIZE, TILE_SIZE)
+
+    start = perf_counter()
+    field = grid.field_to(door)
+    field_time = (perf_counter() - start) * 1000
+    start = perf_counter()
+    wall = Tile(surface, (side // 2 * TILE_SIZE, side // 2 * TILE_SIZE), 1, wall_group)
+    grid.sync()
+    repair_time = (perf_counter() - start) * 1000
+    wall.kill()
+    grid.sync()
+    print(f"field {field_time:.2f}ms, repair after one wall {repair_time:.2f}ms")
+
+    print(f"{'npcs':>8} {'a* ms':>10} {'field ms':>10}")
+    for count in counts:
+        positions = [(rng.uniform(0, side * TILE_SIZE), rng.uniform(0, side * TILE_SIZE)) for _ in range(count)]
+        # One search per NPC, too slow to be worth timing past a few hundred
+        search_time = float("nan")
+        if count <= 500:
+            start = perf_counter()
+            for position in positions:
+                grid.find_path(position, door.center)
+            search_time = (perf_counter() - start) * 1000
+        start = perf_counter()
+        for position in positions:
+            field.direction(position)
+        follow_time = (perf_counter() - start) * 1000
+        print(f"{count:>8} {search_time:>10.2f} {follow_time:>10.3f}")
+
+
+def write_tmx(path: str, width: int, height: int, layers: dict[str, list], objects: list[dict]):
+    """
+    Write an orthogonal Tiled map using the synthetic tileset, with csv layers and one object group.
+    """
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             f'<map version="1.9" orientation="orthogonal" renderorder="right-down" width="{width}" '
+             f'height="{height}" tilewidth="{TILE_SIZE}" tileheight="{TILE_SIZE}" infinite="0">',
+             f' <tileset firstgid="1" name="synthetic" tilewidth="{TILE_SIZE}" tileheight="{TILE_SIZE}" '
+             f'tilecount="4" columns="4">',
+             f'  <image source="synthetic.png" width="{TILE_SIZE * 4}" height="{TILE_SIZE}"/>',
+             ' </tileset>']
+    for layer_id, (name, gids) in enumerate(layers.items(), start=1):
+        rows = [",".join(str(gid) for gid in gids[y * width:(y + 1) * width]) for y in range(height)]
+        lines.append(f' <layer id="{layer_id}" name="{name}" width="{width}" height="{height}">')
+        lines.append('  <data encoding="csv">\n' + ",\n".join(rows) + '\n</data>')
+        lines.append(' </layer>')
+    lines.append(f' <objectgroup id="{len(layers) + 1}" name="Objects">')
+    for object_id, obj in enumerate(objects, start=1):
+        attributes = " ".join(f'{key}="{value}"' for key, value in obj.items())
+        lines.append(f'  <object id="{object_id}" {attributes}/>')
+    lines.append(' </objectgroup>')
+    lines.append('</map>')
+    with open(path, "w") as file:
+        file.write("\n".join(lines))
+
+
+def generate_scene(directory: str, name: str, tiles: int, colliders: int, rng: random.Random) -> dict:
+    """
+    Write a synthetic PlayableScene json, tmx and tileset with the given number of floor and wall tiles.
+    """
+    side = max(8, int((max(tiles, colliders * 2)) ** 0.5) + 1)
+    tileset = pygame.Surface((TILE_SIZE * 4, TILE_SIZE))
+    for index, color in enumerate(("#465862", "#EA5E5E", "#F7BA3E", "#56B3B4")):
+        tileset.fill(color, (index * TILE_SIZE, 0, TILE_SIZE, TILE_SIZE))
+    pygame.image.save(tileset, os.path.join(directory, "synthetic.png"))
+
+    floor = [1 if index < tiles else 0 for index in range(side * side)]
+    walls = [0] * (side * side)
+    spawn = (side // 2) * side + side // 2
+    for cell in rng.sample([cell for cell in range(side * side) if cell != spawn], min(colliders, side * side - 1)):
+        walls[cell] = 2
+    tmx_path = os.path.join(directory, f"{name}.tmx")
+    write_tmx(tmx_path, side, side, {"Floor": floor, "Walls": walls},
+              [{"name": "Player", "class": "Spawn", "x": (side // 2) * TILE_SIZE, "y": (side // 2) * TILE_SIZE},
+               {"name": "Door", "class": "Trigger", "x": 0, "y": 0, "width": TILE_SIZE, "height": TILE_SIZE}])
+
+    data = {
+        "class": "PlayableScene",
+        "tmx_path": tmx_path,
+        "bg_image_path": "",
+        "layers": {
+            "Floor": {"index": 0, "collision": False},
+            "Walls": {"index": 2, "collision": True},
+            "main": {"index": 3, "collision": False}
+        },
+        "interactive": {"Door": {"type": "exit", "action": "", "class": ""}}
+    }
+    with open(os.path.join(directory, f"{name}.json"), "w") as file:
+        json.dump(data, file)
+    return data
+
+
+class Wanderer(Actor):
+    """
+    NPC walking in a random direction that changes every second or so.
+    """
+
+    def __init__(self, position: tuple, z: int, collision_sprites: CollisionGroup, seed: int,
+                 *groups: pygame.sprite.Group):
+        super().__init__(position, "player", z, collision_sprites, *groups)
+        self.rng = random.Random(seed)
+        self.moveTime = 0.0
+
+    def move(self, dt: float):
+        start = perf_counter()
+        super().move(dt)
+        self.moveTime += perf_counter() - start
+
+    def update(self, dt: float):
+        if self.rng.random() < dt:
+            self.direction.update(self.rng.choice((-1, 0, 1)), self.rng.choice((-1, 0, 1)))
+            self.status = ("left" if self.direction.x < 0 else "right") + "_walk"
+        self.set_status()
+        self.move(dt)
+        self.animate(dt)
+
+
+def generate_world(directory: str, name: str, side: int, rng: random.Random) -> dict:
+    """
+    Write a synthetic StreamingScene json and its bundle directly, a map this size would take minutes in pytmx.
+    """
+    floor = array("I", [1]) * (side * side)
+    walls = array("I", bytes(4 * side * side))
+    for cell in rng.sample(range(side * side), side * side // 50):
+        walls[cell] = 2
+    layers = {
+        "Floor": {"index": 0, "collision": False},
+        "Walls": {"index": 2, "collision": True},
+        "main": {"index": 3, "collision": False}
+    }
+    data = {"class": "StreamingScene", "tmx_path": "", "bg_image_path": "", "layers": layers, "interactive": {}}
+    with open(os.path.join(directory, f"{name}.json"), "w") as file:
+        json.dump(data, file)
+
+    atlas = pygame.Surface((TILE_SIZE * 4, TILE_SIZE), pygame.SRCALPHA)
+    for index, color in enumerate(("#465862", "#EA5E5E", "#F7BA3E", "#56B3B4")):
+        atlas.fill(color, (index * TILE_SIZE, 0, TILE_SIZE, TILE_SIZE))
+    centre = side // 2 * TILE_SIZE
+    header = {"scene": name, "width": side, "height": side, "tilewidth": TILE_SIZE, "tileheight": TILE_SIZE,
+              "layers": [{"name": layer, "visible": True, "width": side, "height": side, **layers[layer]}
+                         for layer in ("Floor", "Walls")],
+              "objects": [{"name": "Player", "class": "Spawn", "x": centre, "y": centre, "width": 0, "height": 0,
+                           "gid": 0, "properties": {}}],
+              "animated": [], "tiles": {str(gid): (index * TILE_SIZE, 0, TILE_SIZE, TILE_SIZE)
+                                        for index, gid in enumerate(range(1, 5))},
+              "interactive": {}}
+    write_bundle(bundle_path(name, os.path.join(directory, "Compiled")), header,
+                 [floor.tobytes(), walls.tobytes(), encode_atlas(atlas)])
+    return data
+
+
+def resident_bytes() -> int:
+    # Current rather than peak resident memory, only where procfs has it
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+def soak(side: int = 1024, frames: int = 3600, speed: float = 12.0, samples: int = 12, seed: int = 0) -> dict:
+    """
+    Walk the player across a streamed map far larger than one scene, ignoring walls, and sample the chunks
+    loaded, sprites and memory along the way. Memory should level off once the first chunks are unloaded.
+    """
+    rng = random.Random(seed)
+    display = pygame.display.set_mode((1280, 720))
+    directory = tempfile.mkdtemp(prefix="tt_soak_")
+    generate_world(directory, "world", side, rng)
+    tracemalloc.start()
+
+    manager = SceneManager(display, directory, SaveManager(os.path.join(directory, "Saves")))
+    profiler = manager.profiler
+    manager.enter_scene("world")
+    start = perf_counter()
+    manager.update(0)
+    enter_time = (perf_counter() - start) * 1000
+    scene = manager.sceneStack[-1]
+
+    # Diagonally from one corner towards the other, turning back at the edges
+    span = side * TILE_SIZE
+    player = scene.player
+    player.position.update(display.get_width(), display.get_height())
+    step = pygame.math.Vector2(speed, speed * 0.6)
+    timeline = []
+    dt = 1 / 60
+    for frame in range(frames):
+        position = player.position + step
+        if not display.get_width() <= position.x <= span - display.get_width():
+            step.x = -step.x
+        if not display.get_height() <= position.y <= span - display.get_height():
+            step.y = -step.y
+        player.position += step
+        player.rect.center = round(player.position.x), round(player.position.y)
+        player.hitbox.midbottom = player.rect.midbottom
+        profiler.begin_frame(manager.scene_name())
+        with profiler.phase("update"):
+            manager.update(dt)
+        manager.render(1.0)
+        with profiler.phase("display"):
+            pygame.display.update()
+        profiler.end_frame()
+        if frame % max(1, frames // samples) == 0 or frame == frames - 1:
+            current, _ = tracemalloc.get_traced_memory()
+            timeline.append({"frame": frame, "chunks": len(scene.chunks), "pending": len(scene.streamer.pending),
+                             "sprites": len(scene.allSprites), "collision_layers": len(scene.collisionSprites.layers),
+                             "python_bytes": current, "rss_bytes": resident_bytes()})
+
+    manager.saves.close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    scene.streamer.close()
+    return {
+        "commit": commit_hash(),
+        "parameters": {"side": side, "frames": frames, "speed": speed, "seed": seed},
+        "enter_ms": enter_time,
+        "phases": profiler.report().get("world", {}),
+        "timeline": timeline,
+        "peak_python_bytes": peak
+    }
+
+
+def commit_hash() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run_suite(tiles: int, colliders: int, actors: int, frames: int, seed: int = 0) -> dict:
+    """
+    Load a synthetic scene through SceneManager, run it for a fixed number of frames and report the timings.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+    display = pygame.display.set_mode((1280, 720))
+    directory = tempfile.mkdtemp(prefix="tt_bench_")
+    data = generate_scene(directory, "synthetic", tiles, colliders, rng)
+    tracemalloc.start()
+
+    # Autosaves go to the temporary directory, never over the player's save
+    manager = SceneManager(display, directory, SaveManager(os.path.join(directory, "Saves")))
+    profiler = manager.profiler
+    manager.enter_scene("synthetic")
+    start = perf_counter()
+    manager.update(0)
+    enter_time = (perf_counter() - start) * 1000
+    scene = manager.sceneStack[-1]
+    main_index = data["layers"]["main"]["index"]
+    span = scene.tmx.width * TILE_SIZE
+    wanderers = [Wanderer((rng.randrange(span), rng.randrange(span)), main_index, scene.collisionSprites,
+                          seed + index, scene.allSprites) for index in range(actors)]
+
+    dt = 1 / 60
+    start = perf_counter()
+    for frame in range(frames):
+        if frame % 60 == 0:
+            scene.player.direction.update(rng.choice((-1, 0, 1)), rng.choice((-1, 0, 1)))
+        profiler.begin_frame(manager.scene_name())
+        with profiler.phase("update"):
+            manager.update(dt)
+        manager.render(1.0)
+        with profiler.phase("display"):
+            pygame.display.update()
+        profiler.end_frame()
+    elapsed = perf_counter() - start
+
+    # Suspend the scene the way exit_level does and enter it again from the scene pool, which has to be
+    # big enough for the synthetic scene or the re-entry would be another cold build
+    pool = manager.pool
+    pool.maxBytes = max(pool.maxBytes, scene.memory_estimate())
+    pool.put(manager.sceneStack.pop())
+    if "synthetic" not in pool:
+        raise RuntimeError("The synthetic scene was evicted from the scene pool")
+    hits = len(pool.warmTimes)
+    manager.enter_scene("synthetic")
+    start = perf_counter()
+    manager.update(0)
+    reenter_time = (perf_counter() - start) * 1000
+    if len(pool.warmTimes) != hits + 1:
+        raise RuntimeError("The synthetic scene was not re-entered from the scene pool")
+
+    manager.saves.close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    moves = max(1, frames * actors)
+    result = {
+        "commit": commit_hash(),
+        "python": sys.version.split()[0],
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "parameters": {"tiles": tiles, "colliders": colliders, "actors": actors, "frames": frames, "seed": seed},
+        "fps": frames / elapsed,
+        "frame_ms": elapsed / frames * 1000,
+        "phases": profiler.report().get("synthetic", {}),
+        "actor_move_ms": sum(wanderer.moveTime for wanderer in wanderers) / moves * 1000,
+        "change_scene": {"cold_ms": enter_time, "warm_ms": reenter_time,
+                         "stages_ms": manager.loader.timings.get("synthetic", {})},
+        "pool": pool.report(),
+        "peak_python_bytes": peak
+    }
+    if sys.platform != "win32":
+        import resource
+        # ru_maxrss is in kilobytes on Linux
+        result["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless engine benchmarks")
+    parser.add_argument("--micro", action="store_true", help="run the micro benchmarks instead of the suite")
+    parser.add_argument("--soak", action="store_true", help="walk across a huge streamed map instead of the suite")
+    parser.add_argument("--side", type=int, default=1024, help="soak map width and height in tiles")
+    parser.add_argument("--tiles", type=int, default=10000)
+    parser.add_argument("--colliders", type=int, default=1000)
+    parser.add_argument("--actors", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the json results to this file")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    pygame.init()
+    if args.micro:
+        bench_render([500, 1000, 2500, 5000, 10000])
+        bench_collision([1000, 10000, 100000])
+        bench_map_load()
+        bench_tile_storage([64, 256, 512])
+        bench_crowd([100, 1000, 10000])
+        bench_navigation([10, 100, 1000])
+        return
+
+    if args.soak:
+        result = json.dumps(soak(args.side, args.frames, seed=args.seed), indent=2)
+    else:
+        result = json.dumps(run_suite(args.tiles, args.colliders, args.actors, args.frames, args.seed), indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(result)
+    else:
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import pygame
+from typing import Optional, TYPE_CHECKING
+from constants import TILE_SIZE
+
+if TYPE_CHECKING:
+    from pytmx import TiledTileLayer
+
+# Tiles per chunk side
+CHUNK_TILES = 16
+
+
+class ChunkCache:
+    """
+    Pre-renders static tile layers into chunk surfaces of CHUNK_TILES x CHUNK_TILES tiles.
+    Baked chunks are kept per layer and only rebuilt when the layer's tile data changes.
+    """
+
+    def __init__(self, chunk_tiles: int = CHUNK_TILES, tile_size: int = TILE_SIZE):
+        self.chunkTiles = chunk_tiles
+        self.tileSize = tile_size
+        self.layers: dict[tuple, tuple[int, list]] = {}
+
+    @staticmethod
+    def signature(layer: TiledTileLayer) -> int:
+        return hash(tuple(tuple(row) for row in layer.data))
+
+    @staticmethod
+    def is_static(layer: TiledTileLayer) -> bool:
+        """
+        A layer can be baked if none of its tiles has animation frames.
+        """
+        for _, _, gid in layer.iter_data():
+            if gid:
+                properties = layer.parent.get_tile_properties_by_gid(gid)
+                if properties and properties.get("frames"):
+                    return False
+        return True
+
+    def bake(self, map_path: str, layer: TiledTileLayer) -> list[tuple[tuple, pygame.Surface]]:
+        """
+        Return the (position, surface) chunks of a layer, baking them if the cache is missing or stale.
+        """
+        key = (map_path, layer.name)
+        signature = self.signature(layer)
+        cached = self.layers.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        chunks = {}
+        for x, y, surface in layer.tiles():
+            rect = surface.get_rect(topleft=(x * self.tileSize, y * self.tileSize))
+            chunks.setdefault((x // self.chunkTiles, y // self.chunkTiles), []).append((rect, surface))
+
+        baked = []
+        for tiles in chunks.values():
+            # Same order the per tile sprites were drawn in
+            tiles.sort(key=lambda tile: tile[0].centery)
+            bounds = tiles[0][0].unionall([rect for rect, _ in tiles])
+            chunk = pygame.Surface(bounds.size, pygame.SRCALPHA).convert_alpha()
+            chunk.blits([(surface, (rect.x - bounds.x, rect.y - bounds.y)) for rect, surface in tiles],
+                        doreturn=False)
+            baked.append((bounds.topleft, chunk))
+
+        self.layers[key] = (signature, baked)
+        return baked
+
+    def invalidate(self, map_path: str, layer_name: Optional[str] = None):
+        for key in list(self.layers.keys()):
+            if key[0] == map_path and (layer_name is None or key[1] == layer_name):
+                del self.layers[key]
+
+
+chunk_cache = ChunkCache()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import pygame
+from typing import Union
+
+
+def merge_rects(rects: list[pygame.Rect]) -> list[pygame.Rect]:
+    """
+    Union overlapping rects so no screen region is redrawn twice.
+    """
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRenderer:
+    """
+    Dirty rectangle drawing for scenes where little moves. Each frame only the regions covered by sprites
+    that moved, changed image, appeared or disappeared are cleared and redrawn, and only those regions
+    are returned to be passed to pygame.display.update.
+    """
+
+    def __init__(self, display: pygame.Surface, background: Union[str, tuple, pygame.Surface]):
+        self.display = display
+        self.background = background
+        self.previous: dict[pygame.sprite.Sprite, tuple] = {}
+        self.full = True
+        self.damaged: list[pygame.Rect] = []
+
+    def invalidate(self):
+        """
+        Redraw the whole screen on the next frame.
+        """
+        self.full = True
+
+    def damage(self, rect: pygame.Rect):
+        """
+        Mark a region drawn over by something else, such as a debug HUD, to be redrawn on the next frame.
+        """
+        self.damaged.append(pygame.Rect(rect))
+
+    def clear(self, rect: pygame.Rect):
+        if isinstance(self.background, pygame.Surface):
+            self.display.blit(self.background, rect, rect)
+        else:
+            self.display.fill(self.background, rect)
+
+    def draw(self, sprites: list[pygame.sprite.Sprite]) -> list[pygame.Rect]:
+        screen = self.display.get_rect()
+        current = {sprite: (sprite.image, tuple(sprite.rect)) for sprite in sprites}
+
+        if self.full:
+            self.full = False
+            rects = [screen]
+        else:
+            dirty = self.damaged
+            for sprite, (image, rect) in current.items():
+                old = self.previous.pop(sprite, None)
+                if old is None:
+                    dirty.append(rect)
+                elif old[0] is not image or old[1] != rect:
+                    dirty.append(old[1])
+                    dirty.append(rect)
+            # Whatever is left was removed since the last frame
+            dirty.extend(rect for _, rect in self.previous.values())
+            rects = [rect.clip(screen) for rect in merge_rects(dirty)]
+            rects = [rect for rect in rects if rect.width and rect.height]
+        self.previous = current
+        self.damaged = []
+
+        for rect in rects:
+            self.clear(rect)
+            self.display.set_clip(rect)
+            self.display.blits([(sprite.image, sprite.rect) for sprite in sprites if sprite.rect.colliderect(rect)],
+                               doreturn=False)
+        self.display.set_clip(None)
+        return rects
@@ -1,4 +1,25 @@
 import pygame
+from typing import Callable
+
+# Events carrying player input, the only ones kept in a snapshot
+INPUT_EVENTS = (pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+                pygame.MOUSEWHEEL, pygame.TEXTINPUT)
+
+
+def event_to_dict(event: pygame.event.Event) -> list:
+    attributes = {}
+    for name, value in event.dict.items():
+        if isinstance(value, tuple):
+            value = list(value)
+        if isinstance(value, (bool, int, float, str, list)):
+            attributes[name] = value
+    return [event.type, attributes]
+
+
+def event_from_dict(data: list) -> pygame.event.Event:
+    event_type, attributes = data
+    return pygame.event.Event(event_type, {name: tuple(value) if isinstance(value, list) else value
+                                           for name, value in attributes.items()})
 
 
 class Keyboard:
@@ -10,8 +31,16 @@ class Keyboard:
         self.previousKeyStates = self.currentKeyStates
         self.currentKeyStates = pygame.key.get_pressed()
 
+    def restore(self, pressed: list[int], length: int):
+        """
+        Set the key states from the scancodes held down in a recorded snapshot.
+        """
+        held = set(pressed)
+        self.previousKeyStates = self.currentKeyStates
+        self.currentKeyStates = pygame.key.ScancodeWrapper(index in held for index in range(length))
+
     def is_key_down(self, key_code):
-        if self.currentKeyStates is None or self.previousKeyStates is None:
+        if self.currentKeyStates is None:
             return False
         return self.currentKeyStates[key_code]
 
@@ -26,9 +55,75 @@ class Keyboard:
         return not self.currentKeyStates[key_code] and self.previousKeyStates[key_code]
 
 
+class Mouse:
+    def __init__(self):
+        self.position = (0, 0)
+        self.currentButtonStates = (False, False, False)
+        self.previousButtonStates = (False, False, False)
+
+    def process_input(self):
+        self.position = pygame.mouse.get_pos()
+        self.previousButtonStates = self.currentButtonStates
+        self.currentButtonStates = pygame.mouse.get_pressed()
+
+    def restore(self, position: list, buttons: list):
+        self.position = tuple(position)
+        self.previousButtonStates = self.currentButtonStates
+        self.currentButtonStates = tuple(buttons)
+
+    def is_button_down(self, button: int):
+        return self.currentButtonStates[button]
+
+
 class InputStream:
+    """
+    One snapshot of the keyboard, the mouse and the queued events, taken once per frame.
+    """
+
     def __init__(self):
         self.keyboard = Keyboard()
+        self.mouse = Mouse()
+        self.events: list[pygame.event.Event] = []
 
-    def process_input(self):
+    def process_input(self, events: list[pygame.event.Event] = ()):
         self.keyboard.process_input()
+        self.mouse.process_input()
+        self.events = list(events)
+
+    def snapshot(self) -> dict:
+        """
+        The frame's input as plain data, to be recorded and restored on replay.
+        """
+        keys = self.keyboard.currentKeyStates or ()
+        return {
+            "keys": [index for index, down in enumerate(keys) if down],
+            "key_count": len(keys),
+            "mouse": list(self.mouse.position),
+            "buttons": [bool(down) for down in self.mouse.currentButtonStates],
+            "events": [event_to_dict(event) for event in self.events if event.type in INPUT_EVENTS]
+        }
+
+    def restore(self, snapshot: dict):
+        self.keyboard.restore(snapshot["keys"], snapshot["key_count"])
+        self.mouse.restore(snapshot["mouse"], snapshot["buttons"])
+        self.events = [event_from_dict(event) for event in snapshot["events"]]
+
+
+class EventRouter:
+    """
+    Dispatches events to the handlers subscribed to their type.
+    """
+
+    def __init__(self):
+        self.handlers: dict[int, list[Callable[[pygame.event.Event], None]]] = {}
+
+    def subscribe(self, event_type: int, handler: Callable[[pygame.event.Event], None]):
+        self.handlers.setdefault(event_type, []).append(handler)
+
+    def unsubscribe(self, event_type: int, handler: Callable[[pygame.event.Event], None]):
+        if handler in self.handlers.get(event_type, []):
+            self.handlers[event_type].remove(handler)
+
+    def dispatch(self, event: pygame.event.Event):
+        for handler in self.handlers.get(event.type, ()):
+            handler(event)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+import pygame
+import json
+from concurrent.futures import ThreadPoolExecutor, Future
+from os.path import exists
+from time import perf_counter
+from typing import Optional, TYPE_CHECKING
+from assets import asset_cache
+from mapbundle import MapBundle, bundle_path, is_fresh
+
+if TYPE_CHECKING:
+    from pytmx import TiledMap
+
+SCENES_PATH = "../Data/Scenes"
+
+
+class PendingTile:
+    """
+    A decoded tile whose pixel format conversion still has to happen on the main thread.
+    """
+
+    def __init__(self, surface: pygame.Surface, colorkey, pixelalpha: bool):
+        self.surface = surface
+        self.colorkey = colorkey
+        self.pixelalpha = pixelalpha
+
+    def convert(self) -> pygame.Surface:
+        from pytmx.util_pygame import smart_convert
+
+        return smart_convert(self.surface, self.colorkey, self.pixelalpha)
+
+
+def deferred_image_loader(filename: str, colorkey, **kwargs):
+    """
+    pytmx image loader that decodes and cuts tiles like pytmx's pygame loader, but leaves them unconverted.
+    """
+    from pytmx.util_pygame import handle_transformation
+
+    pixelalpha = kwargs.get("pixelalpha", True)
+    image = pygame.image.load(filename)
+
+    def load_image(rect=None, flags=None):
+        tile = image.subsurface(rect) if rect else image.copy()
+        if flags:
+            tile = handle_transformation(tile, flags)
+        return PendingTile(tile, colorkey, pixelalpha)
+
+    return load_image
+
+
+class PreparedScene:
+    def __init__(self, name: str, data: dict, tmx: Optional[TiledMap | MapBundle], timings: dict,
+                 background: Optional[pygame.Surface] = None):
+        self.name = name
+        self.data = data
+        self.tmx = tmx
+        self.timings = timings
+        # Decoded but not yet converted background image
+        self.background = background
+
+
+class SceneLoader:
+    """
+    Parses scene json and tmx files and decodes background images on a worker thread ahead of a transition.
+    Only the surface conversion of a prefetched map and background runs on the main thread, when the scene is taken.
+    """
+
+    def __init__(self, scenes_path: str = SCENES_PATH):
+        self.scenesPath = scenes_path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scene-loader")
+        self.pending: dict[str, Future] = {}
+        # Converted maps waiting for their scene's load_tmx, by tmx path
+        self.maps: dict[str, TiledMap | MapBundle] = {}
+        # Milliseconds spent in each stage of the last load of every scene
+        self.timings: dict[str, dict] = {}
+
+    def prefetch(self, name: str):
+        if name not in self.pending and name != "exit":
+            self.pending[name] = self.executor.submit(self.prepare, name, True)
+
+    def discard(self, name: str):
+        """
+        Drop a prefetch that is no longer needed.
+        """
+        future = self.pending.pop(name, None)
+        if future is not None:
+            future.cancel()
+
+    def prepare(self, name: str, deferred: bool = False) -> PreparedScene:
+        timings = {}
+        start = perf_counter()
+        with open(f"{self.scenesPath}/{name}.json", "r") as data:
+            scene_data = json.load(data)
+        timings["json"] = (perf_counter() - start) * 1000
+
+        tmx = None
+        tmx_path = scene_data.get("tmx_path", "")
+        if self.scenesPath == SCENES_PATH and is_fresh(name, scene_data):
+            # A compiled bundle only needs mapping and its atlas decoding, the atlas is converted in finalize
+            start = perf_counter()
+            tmx = MapBundle(bundle_path(name))
+            tmx.decode_atlas()
+            timings["bundle"] = (perf_counter() - start) * 1000
+        elif tmx_path and exists(tmx_path) and scene_data["class"] != "StreamingScene":
+            # Streaming scenes read their bundle chunk by chunk, the whole tmx is never parsed at runtime
+            # pytmx is only imported once a scene with a map is loaded, the menu has none
+            from pytmx import TiledMap
+
+            start = perf_counter()
+            tmx = TiledMap(tmx_path, image_loader=deferred_image_loader)
+            timings["tmx"] = (perf_counter() - start) * 1000
+        background = None
+        background_path = scene_data.get("bg_image_path", "")
+        if background_path and exists(background_path) and not asset_cache.cached(background_path, False):
+            start = perf_counter()
+            background = pygame.image.load(background_path)
+            timings["background"] = (perf_counter() - start) * 1000
+        prepared = PreparedScene(name, scene_data, tmx, timings, background)
+        if not deferred:
+            self.finalize_scene(prepared)
+        return prepared
+
+    def finalize_scene(self, prepared: PreparedScene):
+        """
+        Convert what prepare decoded, on the main thread.
+        """
+        if prepared.tmx:
+            start = perf_counter()
+            self.finalize(prepared.tmx)
+            prepared.timings["convert"] = (perf_counter() - start) * 1000
+        if prepared.background is not None:
+            # Cached converted, the scene then takes it from the asset cache
+            start = perf_counter()
+            asset_cache.image(prepared.data["bg_image_path"], False, prepared.background)
+            prepared.background = None
+            prepared.timings["convert_background"] = (perf_counter() - start) * 1000
+
+    @staticmethod
+    def finalize(tmx: TiledMap | MapBundle):
+        if isinstance(tmx, MapBundle):
+            tmx.load_images()
+            return
+        for gid, image in enumerate(tmx.images):
+            if isinstance(image, PendingTile):
+                tmx.images[gid] = image.convert()
+
+    def take(self, name: str) -> PreparedScene:
+        """
+        The prepared scene, waiting for its prefetch if one is running or loading it right away if not.
+        """
+        future = self.pending.pop(name, None)
+        if future is None:
+            prepared = self.prepare(name)
+        else:
+            start = perf_counter()
+            prepared = future.result()
+            prepared.timings["wait"] = (perf_counter() - start) * 1000
+            self.finalize_scene(prepared)
+        if prepared.tmx:
+            self.maps[prepared.data["tmx_path"]] = prepared.tmx
+        self.timings[name] = prepared.timings
+        return prepared
+
+    def load_map(self, tmx_path: str) -> TiledMap | MapBundle:
+        tmx = self.maps.pop(tmx_path, None)
+        if tmx is None:
+            from pytmx import load_pygame
+
+            tmx = load_pygame(tmx_path)
+        return tmx
+
+    def record(self, name: str, stage: str, milliseconds: float):
+        self.timings.setdefault(name, {})[stage] = milliseconds
+
+    def report(self, name: str) -> str:
+        stages = self.timings.get(name, {})
+        return f"{name}: " + ", ".join(f"{stage} {milliseconds:.1f}ms" for stage, milliseconds in stages.items())
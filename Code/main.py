@@ -1,55 +1,129 @@
+from time import perf_counter
+
+# Taken before any other import, for the startup report
+IMPORTS_START = perf_counter()
+
 import pygame
-from settings import load_settings
+import sys
+import json
+from typing import Optional
+from settings import load_settings, FPS_CAP, SIMULATION_RATE
+from profiler import PHASES, StartupReport
+from replay import SessionRecorder
 import ctypes
-from scene import SceneManager, MainScene
+from scene import SceneManager
+
+IMPORTS_MS = (perf_counter() - IMPORTS_START) * 1000
 
 # import test
 
-# Avoid DPI virtualization
-ctypes.windll.user32.SetProcessDPIAware()
+# Avoid DPI virtualization, only Windows has it
+if sys.platform == "win32":
+    ctypes.windll.user32.SetProcessDPIAware()
+
+# Longest frame the simulation catches up on, anything beyond is dropped
+MAX_FRAME_TIME = 0.25
 
 
 class Game:
-    def __init__(self):
-        pygame.init()
-        self.settings = load_settings()
+    def __init__(self, record_path: Optional[str] = None, settings: Optional[dict] = None,
+                 startup_report: bool = False):
+        self.startup = StartupReport(IMPORTS_START, IMPORTS_MS)
+        self.printStartup = startup_report
+        with self.startup.step("pygame_init"):
+            pygame.init()
+        with self.startup.step("settings"):
+            self.settings = load_settings()
+            # Replays run with the settings they were recorded with
+            if settings:
+                self.settings.read_dict(settings)
         self.width = self.settings.getint("display", "width")
         self.height = self.settings.getint("display", "height")
-        self.display = pygame.display.set_mode((self.width, self.height))
-        self.gameCanvas = pygame.Surface((self.width, self.height))
+        with self.startup.step("display"):
+            self.display = pygame.display.set_mode((self.width, self.height))
         self.clock = pygame.time.Clock()
         self.running = True
+        # 0 leaves the frame rate uncapped
+        self.fpsCap = self.settings.getint("performance", "fps_cap", fallback=FPS_CAP)
+        self.timestep = 1 / self.settings.getint("performance", "simulation_rate", fallback=SIMULATION_RATE)
+        self.accumulator = 0.0
         # self.sceneManager = test.SceneManager()
         # self.sceneManager.enter_scene(test.MainMenu(self.gameCanvas))
-        self.sceneManager = SceneManager(self.display)
+        with self.startup.step("scene_manager"):
+            self.sceneManager = SceneManager(self.display)
+        # Only the menu is built before the first frame, it prefetches the scenes it leads to afterwards
         self.sceneManager.enter_scene("main_menu")
+        self.profiler = self.sceneManager.profiler
+        self.recorder: Optional[SessionRecorder] = None
+        if record_path:
+            self.recorder = SessionRecorder(record_path, {section: dict(self.settings[section])
+                                                          for section in self.settings.sections()},
+                                            self.sceneManager.saves.load())
 
-    def render(self):
-        self.display.blit(self.gameCanvas, (0, 0))
+    def quit(self):
+        """
+        Stop the loop and close everything writing to disk. pygame itself is shut down once run returns.
+        """
+        self.running = False
+        self.profiler.close()
+        self.sceneManager.saves.close()
+        if self.recorder:
+            self.recorder.close()
 
-    def event_loop(self):
-        # self.sceneManager.update()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-                pygame.quit()
-                exit()
-
-            self.sceneManager.event_loop(event)
-
-            # if event.type == pygame.KEYDOWN:
-            #   self.sceneManager.input()
+    def step(self, events: list[pygame.event.Event], frame_time: float, snapshot: Optional[dict] = None):
+        """
+        One frame: route the frame's input, simulate frame_time seconds in fixed steps and draw.
+        Replays pass the recorded input snapshot instead of live events.
+        """
+        self.profiler.begin_frame(self.sceneManager.scene_name())
+        with self.profiler.phase("events"):
+            self.sceneManager.process_input(events, snapshot)
+        if self.recorder:
+            self.recorder.record(frame_time, self.sceneManager.input.snapshot())
+        # Simulate in fixed steps for the time that passed, then draw between the last two steps
+        self.accumulator += min(frame_time, MAX_FRAME_TIME)
+        with self.profiler.phase("update"):
+            self.sceneManager.apply_transition()
+            while self.accumulator >= self.timestep:
+                self.sceneManager.update(self.timestep)
+                self.accumulator -= self.timestep
+        if self.sceneManager.quitRequested:
+            self.quit()
+            return
+        rects = self.sceneManager.render(self.accumulator / self.timestep)
+        hud_rect = self.profiler.draw_hud(self.display)
+        if hud_rect and rects is not None:
+            rects.append(hud_rect)
+            self.sceneManager.damage(hud_rect)
+        with self.profiler.phase("display"):
+            if rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(rects)
+        self.profiler.end_frame()
+        # Time spent on the frame, without waiting for the frame cap
+        self.sceneManager.scaler.adapt(sum(self.profiler.frame[name] for name in PHASES))
 
     def run(self):
+        events = pygame.event.get()
+        with self.startup.step("first_frame"):
+            self.step(events, self.clock.tick(self.fpsCap) / 1000)
+        if self.printStartup:
+            print(json.dumps(self.startup.report(self.sceneManager.loader.timings.get("main_menu")), indent=2))
         while self.running:
-            # print([i.__class__.__name__ for i in self.sceneManager.stackScene])
-            self.event_loop()
-            # self.sceneManager.draw(self.clock.tick() / 1000)
-            self.sceneManager.render(self.clock.tick() / 1000)
-            self.render()
-            print(self.sceneManager.sceneStack)
-            pygame.display.update()
+            events = pygame.event.get()
+            if any(event.type == pygame.QUIT for event in events):
+                self.quit()
+                break
+            self.step(events, self.clock.tick(self.fpsCap) / 1000)
+        pygame.quit()
 
 
 if __name__ == '__main__':
-    Game().run()
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", help="record the session into this replay file")
+    parser.add_argument("--startup-report", action="store_true", help="print where the time to first frame went")
+    args = parser.parse_args()
+    Game(args.record, startup_report=args.startup_report).run()
@@ -0,0 +1,334 @@
+from __future__ import annotations
+import os
+import pygame
+import json
+import mmap
+import struct
+from io import BytesIO
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from os.path import exists, getmtime, basename, splitext, dirname, join, normpath
+from time import perf_counter
+from typing import Iterator, Optional
+
+SCENES_PATH = "../Data/Scenes"
+COMPILED_PATH = "../Data/Compiled"
+BUNDLE_EXTENSION = ".ttmb"
+MAGIC = b"TTMB"
+VERSION = 3
+# Magic, version and header length
+PREAMBLE = struct.Struct("<4sHI")
+ATLAS_WIDTH = 2048
+
+
+def bundle_path(name: str, compiled_path: str = COMPILED_PATH) -> str:
+    return f"{compiled_path}/{name}{BUNDLE_EXTENSION}"
+
+
+def is_fresh(name: str, data: dict, scenes_path: str = SCENES_PATH, compiled_path: str = COMPILED_PATH) -> bool:
+    """
+    Whether the compiled bundle of a scene is of the current version and newer than its json, tmx,
+    and the tilesets and images the tmx uses.
+    """
+    path = bundle_path(name, compiled_path)
+    header = read_header(path) if exists(path) else None
+    if header is None:
+        return False
+    sources = [f"{scenes_path}/{name}.json", data.get("tmx_path", "")] + header.get("sources", [])
+    return all(getmtime(path) >= getmtime(source) for source in sources if source and exists(source))
+
+
+def read_header(path: str) -> Optional[dict]:
+    """
+    The header of a bundle, None if it is not a bundle of the current version.
+    """
+    with open(path, "rb") as file:
+        preamble = file.read(PREAMBLE.size)
+        if len(preamble) < PREAMBLE.size:
+            return None
+        magic, version, header_length = PREAMBLE.unpack(preamble)
+        if magic != MAGIC or version != VERSION:
+            return None
+        return json.loads(file.read(header_length))
+
+
+def map_sources(tmx_path: str) -> list[str]:
+    """
+    External tilesets and images a tmx depends on, the files that make its bundle stale when edited.
+    """
+    from xml.etree import ElementTree
+
+    def images(node: ElementTree.Element, directory: str) -> list[str]:
+        return [normpath(join(directory, image.get("source"))) for image in node.iter("image") if image.get("source")]
+
+    root = ElementTree.parse(tmx_path).getroot()
+    # Images of embedded tilesets and image layers
+    sources = images(root, dirname(tmx_path))
+    for tileset in root.iter("tileset"):
+        if tileset.get("source"):
+            path = normpath(join(dirname(tmx_path), tileset.get("source")))
+            sources.append(path)
+            if exists(path):
+                sources += images(ElementTree.parse(path).getroot(), dirname(path))
+    return sources
+
+
+def pack(images: dict[int, pygame.Surface]) -> tuple[pygame.Surface, dict[int, tuple]]:
+    """
+    Shelf pack tile images into one atlas, tallest first. The atlas is widened for images wider than
+    ATLAS_WIDTH so every image fits in it.
+    """
+    atlas_width = max([ATLAS_WIDTH] + [image.get_width() for image in images.values()])
+    rects = {}
+    x = y = shelf = 0
+    for gid, image in sorted(images.items(), key=lambda item: -item[1].get_height()):
+        width, height = image.get_size()
+        if x + width > atlas_width:
+            x = 0
+            y += shelf
+            shelf = 0
+        rects[gid] = (x, y, width, height)
+        x += width
+        shelf = max(shelf, height)
+    # Trimmed to the packed images, a map with few tiles should not decode a whole atlas row
+    used_width = max((x + width for x, _, width, _ in rects.values()), default=1)
+    atlas = pygame.Surface((used_width, max(1, y + shelf)), pygame.SRCALPHA)
+    for gid, (x, y, width, height) in rects.items():
+        atlas.blit(images[gid], (x, y))
+    return atlas, rects
+
+
+def encode_atlas(atlas: pygame.Surface) -> bytes:
+    # Stored as png, raw pixels would make up most of the bundle
+    buffer = BytesIO()
+    pygame.image.save(atlas, buffer, "atlas.png")
+    return buffer.getvalue()
+
+
+def compile_scene(name: str, scenes_path: str = SCENES_PATH,
+                  compiled_path: str = COMPILED_PATH) -> Optional[tuple[str, int, float]]:
+    """
+    Compile a scene json and its tmx into a bundle: layer gid arrays, objects and a tile atlas.
+    """
+    from pytmx import load_pygame, TiledTileLayer
+
+    with open(f"{scenes_path}/{name}.json", "r") as data:
+        scene_data = json.load(data)
+    tmx_path = scene_data.get("tmx_path", "")
+    if not tmx_path or not exists(tmx_path):
+        return None
+
+    start = perf_counter()
+    tmx = load_pygame(tmx_path)
+    scene_layers = scene_data.get("layers", {})
+    used = set()
+    layers = []
+    blobs = []
+    for layer in tmx.layers:
+        if not isinstance(layer, TiledTileLayer):
+            continue
+        gids = array("I", (gid for row in layer.data for gid in row))
+        used.update(gids)
+        layers.append({"name": layer.name, "visible": bool(layer.visible), "width": layer.width,
+                       "height": layer.height, **scene_layers.get(layer.name, {})})
+        blobs.append(gids.tobytes())
+
+    objects = []
+    for obj in tmx.objects:
+        if obj.gid:
+            used.add(obj.gid)
+        objects.append({"name": obj.name, "class": getattr(obj, "class", None) or getattr(obj, "type", None),
+                        "x": obj.x, "y": obj.y, "width": obj.width, "height": obj.height, "gid": obj.gid,
+                        "properties": dict(obj.properties)})
+
+    animated = []
+    for gid in used:
+        properties = tmx.get_tile_properties_by_gid(gid) if gid else None
+        if properties and properties.get("frames"):
+            animated.append(gid)
+
+    atlas, rects = pack({gid: tmx.images[gid] for gid in used if gid and tmx.images[gid]})
+    blobs.append(encode_atlas(atlas))
+
+    header = {"scene": name, "width": tmx.width, "height": tmx.height, "tilewidth": tmx.tilewidth,
+              "tileheight": tmx.tileheight, "layers": layers, "objects": objects, "animated": animated,
+              "tiles": {str(gid): rect for gid, rect in rects.items()},
+              "interactive": scene_data.get("interactive", {}), "sources": map_sources(tmx_path), "blobs": []}
+    path = write_bundle(bundle_path(name, compiled_path), header, blobs)
+    return path, os.path.getsize(path), (perf_counter() - start) * 1000
+
+
+def write_bundle(path: str, header: dict, blobs: list[bytes]) -> str:
+    """
+    Write a bundle header and its blobs, each blob aligned to 4 bytes so gid arrays can be cast in place.
+    """
+    # Blob offsets depend on the header length, so lay them out until the header stops growing
+    offsets = []
+    header_bytes = b""
+    while True:
+        header["blobs"] = offsets
+        header_bytes = json.dumps(header).encode()
+        position = PREAMBLE.size + len(header_bytes)
+        position += -position % 4
+        new_offsets = []
+        for blob in blobs:
+            new_offsets.append((position, len(blob)))
+            position += len(blob) + (-len(blob) % 4)
+        if new_offsets == offsets:
+            break
+        offsets = new_offsets
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as file:
+        file.write(PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        for (offset, _), blob in zip(offsets, blobs):
+            file.write(b"\0" * (offset - file.tell()))
+            file.write(blob)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def init_worker():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+
+def compile_all(workers: Optional[int] = None) -> dict:
+    """
+    Compile every scene in Data/Scenes in parallel.
+    """
+    names = [splitext(basename(path))[0] for path in glob(f"{SCENES_PATH}/*.json")]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        return {name: result for name, result in zip(names, executor.map(compile_scene, names)) if result}
+
+
+class BundleObject:
+    def __init__(self, bundle: MapBundle, data: dict):
+        self.parent = bundle
+        self.name = data["name"]
+        self.type = data["class"]
+        setattr(self, "class", data["class"])
+        self.x = data["x"]
+        self.y = data["y"]
+        self.width = data["width"]
+        self.height = data["height"]
+        self.gid = data["gid"]
+        self.properties = data["properties"]
+
+    @property
+    def image(self) -> Optional[pygame.Surface]:
+        return self.parent.images[self.gid] if self.gid else None
+
+
+class BundleTileLayer:
+    def __init__(self, bundle: MapBundle, data: dict, gids: memoryview):
+        self.parent = bundle
+        self.name = data["name"]
+        self.visible = data["visible"]
+        self.width = data["width"]
+        self.height = data["height"]
+        self.gids = gids
+        # Row views over the mapped array, shaped like pytmx layer data
+        self.data = [gids[y * self.width:(y + 1) * self.width] for y in range(self.height)]
+
+    def iter_data(self) -> Iterator[tuple[int, int, int]]:
+        width = self.width
+        for index, gid in enumerate(self.gids):
+            yield index % width, index // width, gid
+
+    def tiles(self) -> Iterator[tuple[int, int, pygame.Surface]]:
+        images = self.parent.images
+        for x, y, gid in self.iter_data():
+            if gid and images[gid]:
+                yield x, y, images[gid]
+
+
+class MapBundle:
+    """
+    A compiled map, read through a memory map. Exposes the parts of pytmx's TiledMap the scenes use.
+    Layer gids are read straight from the mapped file. The atlas can be decoded off the main thread by decode_atlas,
+    load_images then only converts it.
+    The file stays mapped until close, bundles can be used as context managers.
+    """
+
+    def __init__(self, path: str):
+        self.filename = path
+        with open(path, "rb") as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = view = memoryview(self.mmap)
+        magic, version, header_length = PREAMBLE.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} map bundle")
+        self.header = json.loads(bytes(view[PREAMBLE.size:PREAMBLE.size + header_length]))
+        self.width = self.header["width"]
+        self.height = self.header["height"]
+        self.tilewidth = self.header["tilewidth"]
+        self.tileheight = self.header["tileheight"]
+        self.blobs = [view[offset:offset + length] for offset, length in self.header["blobs"]]
+        self.layers = [BundleTileLayer(self, data, blob.cast("I"))
+                       for data, blob in zip(self.header["layers"], self.blobs)]
+        self.objects = [BundleObject(self, data) for data in self.header["objects"]]
+        self.animated = set(self.header["animated"])
+        self.images: list[Optional[pygame.Surface]] = []
+        # Decoded atlas waiting for load_images to convert it
+        self.atlas: Optional[pygame.Surface] = None
+
+    @property
+    def visible_layers(self) -> Iterator[BundleTileLayer]:
+        return (layer for layer in self.layers if layer.visible)
+
+    def decode_atlas(self):
+        """
+        Decode the png atlas, safe to run on a worker thread.
+        """
+        if self.atlas is None:
+            self.atlas = pygame.image.load(BytesIO(self.blobs[-1]), "atlas.png")
+
+    def load_images(self):
+        tiles = {int(gid): rect for gid, rect in self.header["tiles"].items()}
+        self.decode_atlas()
+        atlas = self.atlas.convert_alpha()
+        self.atlas = None
+        self.images = [None] * (max(tiles, default=0) + 1)
+        for gid, rect in tiles.items():
+            self.images[gid] = atlas.subsurface(rect)
+
+    def close(self):
+        """
+        Unmap the file. Images already loaded stay valid, layer gids can no longer be read.
+        """
+        if self.mmap.closed:
+            return
+        # Every view into the map has to be released before it can be closed
+        for layer in self.layers:
+            for row in layer.data:
+                row.release()
+            layer.gids.release()
+        for blob in self.blobs:
+            blob.release()
+        self.view.release()
+        self.mmap.close()
+
+    def __enter__(self) -> MapBundle:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_object_by_name(self, name: str) -> BundleObject:
+        for obj in self.objects:
+            if obj.name == name:
+                return obj
+        raise ValueError(f"Object {name} not found")
+
+    def get_tile_properties_by_gid(self, gid: int) -> Optional[dict]:
+        # Only animation matters at runtime, the frames themselves are not compiled
+        return {"frames": True} if gid in self.animated else None
+
+
+if __name__ == '__main__':
+    for scene_name, (bundle, size, milliseconds) in compile_all().items():
+        print(f"{scene_name}: {bundle} {size / 1024:.1f}KiB in {milliseconds:.0f}ms")
@@ -0,0 +1,302 @@
+from __future__ import annotations
+import heapq
+import pygame
+from array import array
+from typing import Iterable, Iterator, Optional
+from constants import TILE_SIZE
+from spatial import CollisionGroup
+
+# Step costs, diagonals as the rounded sqrt(2) of a straight step
+STRAIGHT_COST = 10
+DIAGONAL_COST = 14
+UNREACHABLE = 0xFFFFFFFF
+NEIGHBOURS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+# Flow fields kept per grid, the least recently used one is dropped past this
+MAX_FIELDS = 32
+
+
+class NavGrid:
+    """
+    Walkability grid over a scene's collision geometry: a cell is blocked when a collision tile or hitbox
+    overlaps it. Listens to its CollisionGroup, so cells are recomputed only where geometry was added or
+    removed, and the flow fields built on it are repaired around those cells instead of rebuilt.
+    Agents move between cell centres, diagonally only when both cells beside the diagonal are free.
+    """
+
+    def __init__(self, collision_sprites: CollisionGroup, width: int, height: int, cell_size: int = TILE_SIZE):
+        self.collisionSprites = collision_sprites
+        self.width = width
+        self.height = height
+        self.cellSize = cell_size
+        self.blocked = bytearray(width * height)
+        self.fields: dict[frozenset, FlowField] = {}
+        # Areas changed since the last query, applied in one go by sync
+        self.dirty: list[pygame.Rect] = []
+        self.build()
+        collision_sprites.listeners.append(self.dirty.append)
+
+    def build(self):
+        """
+        Mark every cell under the group's sprites and layer tiles.
+        """
+        group = self.collisionSprites
+        group.flush()
+        self.blocked = bytearray(self.width * self.height)
+        for sprite in group:
+            self.mark(getattr(sprite, group.box))
+        for _, layer in group.layers:
+            for x, y, surface in layer.tiles():
+                self.mark(surface.get_rect(topleft=(x * layer.tileSize, y * layer.tileSize)))
+        self.fields.clear()
+        self.dirty.clear()
+
+    def close(self):
+        """
+        Stop listening to the collision group.
+        """
+        if self.dirty.append in self.collisionSprites.listeners:
+            self.collisionSprites.listeners.remove(self.dirty.append)
+
+    def cell_range(self, rect: pygame.Rect) -> tuple[int, int, int, int]:
+        size = self.cellSize
+        return (max(0, rect.left // size), max(0, rect.top // size),
+                min(self.width - 1, max(rect.left, rect.right - 1) // size),
+                min(self.height - 1, max(rect.top, rect.bottom - 1) // size))
+
+    def mark(self, rect: pygame.Rect):
+        left, top, right, bottom = self.cell_range(rect)
+        for y in range(top, bottom + 1):
+            row = y * self.width
+            self.blocked[row + left:row + right + 1] = b"\1" * (right - left + 1)
+
+    def sync(self):
+        """
+        Recompute the cells under the areas changed since the last call and repair the cached fields.
+        """
+        # Sprites added since the last query are only reported once the group indexes them
+        self.collisionSprites.flush()
+        if not self.dirty:
+            return
+        size = self.cellSize
+        cells = set()
+        for rect in self.dirty:
+            left, top, right, bottom = self.cell_range(rect)
+            cells.update((x, y) for y in range(top, bottom + 1) for x in range(left, right + 1))
+        self.dirty.clear()
+
+        blocked = []
+        freed = []
+        group = self.collisionSprites
+        for x, y in cells:
+            index = y * self.width + x
+            now = group.next_collision(pygame.Rect(x * size, y * size, size, size)) is not None
+            if now != self.blocked[index]:
+                self.blocked[index] = now
+                (blocked if now else freed).append(index)
+        if blocked or freed:
+            for field in self.fields.values():
+                field.repair(blocked, freed)
+
+    def cell_of(self, position: Iterable[float]) -> tuple[int, int]:
+        x, y = position
+        return int(x // self.cellSize), int(y // self.cellSize)
+
+    def centre(self, index: int) -> pygame.math.Vector2:
+        size = self.cellSize
+        return pygame.math.Vector2((index % self.width + 0.5) * size, (index // self.width + 0.5) * size)
+
+    def walkable(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height and not self.blocked[y * self.width + x]
+
+    def neighbours(self, index: int) -> Iterator[tuple[int, int]]:
+        """
+        (index, step cost) of the cells reachable from a cell in one step.
+        """
+        width = self.width
+        x, y = index % width, index // width
+        walkable = self.walkable
+        for dx, dy in NEIGHBOURS:
+            if not walkable(x + dx, y + dy):
+                continue
+            if dx and dy:
+                # No cutting corners past a blocked cell
+                if not (walkable(x + dx, y) and walkable(x, y + dy)):
+                    continue
+                yield index + dy * width + dx, DIAGONAL_COST
+            else:
+                yield index + dy * width + dx, STRAIGHT_COST
+
+    def find_path(self, start: Iterable[float], goal: Iterable[float]) -> Optional[list[pygame.math.Vector2]]:
+        """
+        A* between two world positions. The cell centres to walk through after the start cell, or None when
+        the goal cannot be reached.
+        """
+        self.sync()
+        (start_x, start_y), (goal_x, goal_y) = self.cell_of(start), self.cell_of(goal)
+        if not (self.walkable(start_x, start_y) and self.walkable(goal_x, goal_y)):
+            return None
+        width = self.width
+        start_index = start_y * width + start_x
+        goal_index = goal_y * width + goal_x
+
+        def heuristic(index: int) -> int:
+            # Octile distance, exact on an empty grid
+            dx, dy = abs(index % width - goal_x), abs(index // width - goal_y)
+            return STRAIGHT_COST * max(dx, dy) + (DIAGONAL_COST - STRAIGHT_COST) * min(dx, dy)
+
+        costs = {start_index: 0}
+        came_from = {}
+        frontier = [(heuristic(start_index), 0, start_index)]
+        while frontier:
+            _, cost, index = heapq.heappop(frontier)
+            if index == goal_index:
+                path = []
+                while index != start_index:
+                    path.append(self.centre(index))
+                    index = came_from[index]
+                path.reverse()
+                return path
+            if cost > costs[index]:
+                continue
+            for neighbour, step in self.neighbours(index):
+                new_cost = cost + step
+                if new_cost < costs.get(neighbour, UNREACHABLE):
+                    costs[neighbour] = new_cost
+                    came_from[neighbour] = index
+                    heapq.heappush(frontier, (new_cost + heuristic(neighbour), new_cost, neighbour))
+        return None
+
+    def field_to(self, target: pygame.Rect | Iterable[float]) -> FlowField:
+        """
+        Shared flow field towards a position, or towards every cell under a rect such as an interaction
+        trigger. Fields are cached, so any number of agents heading to the same target follow one field.
+        """
+        self.sync()
+        if isinstance(target, pygame.Rect):
+            left, top, right, bottom = self.cell_range(target)
+            goals = frozenset(y * self.width + x for y in range(top, bottom + 1) for x in range(left, right + 1))
+        else:
+            x, y = self.cell_of(target)
+            goals = frozenset((y * self.width + x,)) if 0 <= x < self.width and 0 <= y < self.height else frozenset()
+        field = self.fields.pop(goals, None)
+        if field is None:
+            field = FlowField(self, goals)
+            if len(self.fields) >= MAX_FIELDS:
+                del self.fields[next(iter(self.fields))]
+        # Reinserted so the dict stays in least recently used order
+        self.fields[goals] = field
+        return field
+
+
+class FlowField:
+    """
+    Cost to the nearest goal cell from every cell of a NavGrid. An agent anywhere on the grid steers
+    towards its cheapest neighbour, so following the field needs no search per agent.
+    """
+
+    def __init__(self, grid: NavGrid, goals: frozenset):
+        self.grid = grid
+        self.goals = goals
+        self.costs = array("I", [UNREACHABLE]) * (grid.width * grid.height)
+        seeds = []
+        for goal in goals:
+            if not grid.blocked[goal]:
+                self.costs[goal] = 0
+                seeds.append((0, goal))
+        self.spread(seeds)
+
+    def spread(self, frontier: list[tuple[int, int]]):
+        """
+        Dijkstra from the given (cost, cell) entries, lowering the costs it can improve.
+        """
+        costs = self.costs
+        neighbours = self.grid.neighbours
+        heapq.heapify(frontier)
+        while frontier:
+            cost, index = heapq.heappop(frontier)
+            if cost > costs[index]:
+                continue
+            for neighbour, step in neighbours(index):
+                if cost + step < costs[neighbour]:
+                    costs[neighbour] = cost + step
+                    heapq.heappush(frontier, (cost + step, neighbour))
+
+    def best_cost(self, index: int) -> int:
+        if index in self.goals:
+            return 0
+        costs = self.costs
+        return min((costs[neighbour] + step for neighbour, step in self.grid.neighbours(index)
+                    if costs[neighbour] != UNREACHABLE), default=UNREACHABLE)
+
+    def repair(self, blocked: list[int], freed: list[int]):
+        """
+        Update the costs after cells of the grid were blocked or freed, touching only the cells whose cost
+        could have gone through them.
+        """
+        grid = self.grid
+        costs = self.costs
+        width = grid.width
+        # Cells next to a changed one also gain or lose the diagonal steps around it
+        around = set()
+        for index in blocked + freed:
+            x, y = index % width, index // width
+            around.update((y + dy) * width + x + dx for dx, dy in NEIGHBOURS
+                          if 0 <= x + dx < width and 0 <= y + dy < grid.height)
+
+        # Cells whose cost may have come through a blocked cell or lost diagonal: every cell uphill of them
+        stale = set()
+        stack = [index for index in blocked if costs[index] != UNREACHABLE]
+        stack += [index for index in around if costs[index] != UNREACHABLE and costs[index] < self.best_cost(index)]
+        while stack:
+            index = stack.pop()
+            if index in stale:
+                continue
+            stale.add(index)
+            x, y = index % width, index // width
+            for dx, dy in NEIGHBOURS:
+                if not (0 <= x + dx < width and 0 <= y + dy < grid.height):
+                    continue
+                neighbour = index + dy * width + dx
+                step = DIAGONAL_COST if dx and dy else STRAIGHT_COST
+                if costs[neighbour] != UNREACHABLE and costs[neighbour] == costs[index] + step:
+                    stack.append(neighbour)
+        for index in stale:
+            costs[index] = UNREACHABLE
+
+        # Reseed the stale cells from their settled neighbours, and the freed ones and their surroundings
+        frontier = []
+        for index in stale.union(freed, around):
+            if grid.blocked[index]:
+                costs[index] = UNREACHABLE
+                continue
+            cost = self.best_cost(index)
+            if cost < costs[index]:
+                costs[index] = cost
+                frontier.append((cost, index))
+        self.spread(frontier)
+
+    def cost(self, position: Iterable[float]) -> int:
+        x, y = self.grid.cell_of(position)
+        if not (0 <= x < self.grid.width and 0 <= y < self.grid.height):
+            return UNREACHABLE
+        return self.costs[y * self.grid.width + x]
+
+    def direction(self, position: Iterable[float]) -> pygame.math.Vector2:
+        """
+        Unit vector from position towards the centre of the cheapest neighbouring cell, zero on a goal cell
+        or where no goal can be reached.
+        """
+        grid = self.grid
+        grid.sync()
+        x, y = grid.cell_of(position)
+        if not (0 <= x < grid.width and 0 <= y < grid.height):
+            return pygame.math.Vector2()
+        index = y * grid.width + x
+        costs = self.costs
+        if index in self.goals or costs[index] == UNREACHABLE:
+            return pygame.math.Vector2()
+        best = min(grid.neighbours(index), key=lambda neighbour: costs[neighbour[0]] + neighbour[1], default=None)
+        if best is None or costs[best[0]] == UNREACHABLE:
+            return pygame.math.Vector2()
+        direction = grid.centre(best[0]) - pygame.math.Vector2(position)
+        return direction.normalize() if direction.length_squared() > 0 else direction
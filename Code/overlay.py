@@ -1,22 +1,35 @@
 import pygame
 from player import Player
+from assets import asset_cache, text_cache
 
 
 class Overlay:
     def __init__(self, player: Player, display_surface: pygame.Surface):
         self.gameCanvas = display_surface
         self.player = player
-        self.font = pygame.font.Font("../Assets/Fonts/monogram.ttf", 40)
         # Overlay
-        self.overlayUI = pygame.image.load("../Assets/Overlay/overlay.png").convert_alpha()
+        self.overlayUI = asset_cache.image("../Assets/Overlay/overlay.png")
         self.overlayUIRect = self.overlayUI.get_rect(topleft=(10, 10))
 
-        self.playerIcon = pygame.image.load("../Assets/Overlay/player_icon.png").convert_alpha()
+        self.playerIcon = asset_cache.image("../Assets/Overlay/player_icon.png")
         self.playerIconRect = self.overlayUI.get_rect(topleft=(14, 9))
+        # Composited HUD, rebuilt only when the values it shows change
+        self.image = pygame.Surface((0, 0))
+        self.rect = self.image.get_rect()
+        self.shownMoney = None
+
+    def compose(self, money: int):
+        money_surf = text_cache.render(str(money), 40, "#E2E2E2")
+        money_rect = money_surf.get_rect(topleft=(180, 63))
+        self.rect = self.overlayUIRect.unionall([self.playerIconRect, money_rect])
+        self.image = pygame.Surface(self.rect.size, pygame.SRCALPHA).convert_alpha()
+        for surface, rect in ((self.overlayUI, self.overlayUIRect), (self.playerIcon, self.playerIconRect),
+                              (money_surf, money_rect)):
+            self.image.blit(surface, (rect.x - self.rect.x, rect.y - self.rect.y))
+        self.shownMoney = money
 
     def display(self):
         money = self.player.itemInventory["money"]
-        money_surf = self.font.render(str(money), False, "#E2E2E2")
-        self.gameCanvas.blit(self.overlayUI, self.overlayUIRect)
-        self.gameCanvas.blit(self.playerIcon, self.playerIconRect)
-        self.gameCanvas.blit(money_surf, (180, 63))
+        if money != self.shownMoney:
+            self.compose(money)
+        self.gameCanvas.blit(self.image, self.rect)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import pygame
+import csv
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Optional
+from assets import asset_cache, text_cache
+
+# Frame phases, in the order they run
+PHASES = ("events", "update", "draw", "overlay", "display")
+PROFILE_WINDOW = 300
+PROFILE_CSV_PATH = "profile.csv"
+HUD_REFRESH_FRAMES = 15
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class FrameProfiler:
+    """
+    Times each frame phase for the active scene and keeps rolling percentiles over the last frames.
+    F3 toggles the on screen HUD, F4 starts and stops dumping every frame into a CSV file.
+    """
+
+    def __init__(self, window: int = PROFILE_WINDOW, csv_path: str = PROFILE_CSV_PATH):
+        self.window = window
+        self.csvPath = csv_path
+        self.samples: dict[str, dict[str, deque]] = {}
+        self.frame: dict[str, float] = {}
+        self.frameStart = 0.0
+        self.frameCount = 0
+        self.scene = ""
+        # Fraction of the screen the last frame updated
+        self.redrawn = 1.0
+        # Extra HUD lines by label, kept up to date by their owners
+        self.status: dict[str, str] = {}
+        # HUD
+        self.hudVisible = False
+        self.hudImage: Optional[pygame.Surface] = None
+        self.hudRect = pygame.Rect(0, 0, 0, 0)
+        # CSV dump
+        self.csvFile = None
+        self.csvWriter = None
+
+    def begin_frame(self, scene: str):
+        self.scene = scene
+        self.frame = dict.fromkeys(PHASES, 0.0)
+        self.frameStart = perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.frame[name] = self.frame.get(name, 0.0) + (perf_counter() - start) * 1000
+
+    def end_frame(self):
+        self.frame["total"] = (perf_counter() - self.frameStart) * 1000
+        scene_samples = self.samples.setdefault(self.scene, {})
+        for name, milliseconds in self.frame.items():
+            scene_samples.setdefault(name, deque(maxlen=self.window)).append(milliseconds)
+        if self.csvWriter:
+            self.csvWriter.writerow([self.frameCount, self.scene] +
+                                    [f"{self.frame.get(name, 0.0):.4f}" for name in PHASES + ("total",)] +
+                                    [f"{self.redrawn:.4f}"])
+        self.frameCount += 1
+
+    def percentiles(self, name: str, scene: Optional[str] = None) -> tuple[float, float, float]:
+        values = list(self.samples.get(scene or self.scene, {}).get(name, ()))
+        return percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)
+
+    def report(self) -> dict:
+        return {scene: {name: dict(zip(("p50", "p95", "p99"), self.percentiles(name, scene))) for name in phases}
+                for scene, phases in self.samples.items()}
+
+    def toggle_csv(self):
+        if self.csvFile:
+            self.csvFile.close()
+            self.csvFile = None
+            self.csvWriter = None
+        else:
+            self.csvFile = open(self.csvPath, "w", newline="")
+            self.csvWriter = csv.writer(self.csvFile)
+            self.csvWriter.writerow(["frame", "scene"] + [f"{name}_ms" for name in PHASES + ("total",)] + ["redrawn"])
+
+    def handle_event(self, event: pygame.event.Event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_F3:
+                self.hudVisible = not self.hudVisible
+            elif event.key == pygame.K_F4:
+                self.toggle_csv()
+
+    def draw_hud(self, surface: pygame.Surface) -> Optional[pygame.Rect]:
+        """
+        Draw the HUD if it is visible and return the region it covers.
+        """
+        if not self.hudVisible:
+            return None
+        if self.hudImage is None or self.frameCount % HUD_REFRESH_FRAMES == 0:
+            font = text_cache.font(24)
+            lines = [f"{self.scene}  p50 / p95 / p99 ms" + ("  [csv]" if self.csvWriter else "")]
+            for name in PHASES + ("total",):
+                p50, p95, p99 = self.percentiles(name)
+                lines.append(f"{name:<8} {p50:6.2f} {p95:6.2f} {p99:6.2f}")
+            lines.append(f"{'redrawn':<8} {self.redrawn:6.1%}")
+            lines.extend(f"{label:<8} {value}" for label, value in self.status.items())
+            rendered = [font.render(line, False, "#E2E2E2") for line in lines]
+            width = max(line.get_width() for line in rendered) + 16
+            height = sum(line.get_height() for line in rendered) + 16
+            self.hudImage = pygame.Surface((width, height), pygame.SRCALPHA)
+            self.hudImage.fill((30, 30, 30, 200))
+            y = 8
+            for line in rendered:
+                self.hudImage.blit(line, (8, y))
+                y += line.get_height()
+            self.hudRect = self.hudImage.get_rect(topright=(surface.get_width() - 10, 10))
+        return surface.blit(self.hudImage, self.hudRect)
+
+    def close(self):
+        if self.csvFile:
+            self.toggle_csv()
+
+
+class StartupReport:
+    """
+    Time to the first frame of Game, split into the steps of its construction and the first frame.
+    Image and font loads are reported apart too, they happen inside the other steps.
+    """
+
+    def __init__(self, start: float, imports_ms: float = 0.0):
+        self.start = start
+        self.steps: dict[str, float] = {"imports": imports_ms}
+
+    @contextmanager
+    def step(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = (perf_counter() - start) * 1000
+
+    def report(self, scene_timings: Optional[dict] = None) -> dict:
+        return {
+            "time_to_first_frame_ms": (perf_counter() - self.start) * 1000,
+            "steps_ms": self.steps,
+            "first_scene_ms": scene_timings or {},
+            "image_loads_ms": asset_cache.loadTime,
+            "font_loads_ms": text_cache.fontTime,
+            "text_renders_ms": text_cache.renderTime
+        }
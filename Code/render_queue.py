@@ -0,0 +1,61 @@
+from __future__ import annotations
+import pygame
+from typing import Iterable, Iterator
+
+
+class RenderQueue:
+    """
+    Keeps the draw order key, (z, rect.centery, serial), of every queued sprite.
+    Keys are only recomputed when sprites are refreshed after moving, and a frame only sorts the sprites
+    that are actually visible by their stored keys.
+    """
+
+    def __init__(self, layers: Iterable[int]):
+        self.layers = set(layers)
+        self.entries: dict[pygame.sprite.Sprite, tuple[int, int, int]] = {}
+        self.serial = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, sprite: pygame.sprite.Sprite) -> bool:
+        return sprite in self.entries
+
+    def __iter__(self) -> Iterator[pygame.sprite.Sprite]:
+        return iter(self.ordered(self.entries))
+
+    def add(self, sprite: pygame.sprite.Sprite):
+        if sprite in self.entries:
+            return
+        # Ties on centery keep insertion order, like the stable sort this replaces
+        self.entries[sprite] = (sprite.z, sprite.rect.centery, self.serial)
+        self.serial += 1
+
+    def remove(self, sprite: pygame.sprite.Sprite):
+        self.entries.pop(sprite, None)
+
+    def refresh(self, sprites: Iterable[pygame.sprite.Sprite]):
+        """
+        Update the keys of the given sprites if their z or centery changed since they were queued.
+        """
+        entries = self.entries
+        for sprite in sprites:
+            entry = entries.get(sprite)
+            if entry is not None and (sprite.z != entry[0] or sprite.rect.centery != entry[1]):
+                entries[sprite] = (sprite.z, sprite.rect.centery, entry[2])
+
+    def key(self, sprite: pygame.sprite.Sprite) -> tuple:
+        """
+        Draw order key of a queued sprite, usable to sort any subset of the queue.
+        """
+        return self.entries[sprite]
+
+    def ordered(self, sprites: Iterable[pygame.sprite.Sprite]) -> list[pygame.sprite.Sprite]:
+        """
+        The drawable sprites among the given ones, in draw order. Sprites on a z outside the layers are not drawn.
+        """
+        entries = self.entries
+        layers = self.layers
+        drawn = [sprite for sprite in sprites if sprite in entries and entries[sprite][0] in layers]
+        drawn.sort(key=entries.__getitem__)
+        return drawn
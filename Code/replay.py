@@ -0,0 +1,99 @@
+"""
+Recorded play sessions: every frame's input snapshot and frame time, plus the random seed and the save
+the session started from. Replaying one runs the exact same frames headless and writes per frame timings,
+so sessions double as performance regression fixtures. Run from the Code directory.
+
+python main.py --record session.replay      play and record
+python replay.py session.replay             replay, timings in replay.csv and percentiles as json
+"""
+from __future__ import annotations
+import os
+import gzip
+import json
+import random
+from typing import IO, Iterator, Optional
+
+REPLAY_VERSION = 1
+
+
+class SessionRecorder:
+    """
+    Writes a session as gzipped json lines, a header then one line per frame.
+    """
+
+    def __init__(self, path: str, settings: dict, save: Optional[dict], seed: Optional[int] = None):
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        random.seed(seed)
+        self.file: IO = gzip.open(path, "wt", encoding="utf-8")
+        self.write({"version": REPLAY_VERSION, "seed": seed, "settings": settings, "save": save})
+        self.frames = 0
+
+    def write(self, data: dict):
+        self.file.write(json.dumps(data, separators=(",", ":")) + "\n")
+
+    def record(self, frame_time: float, snapshot: dict):
+        self.write({"dt": frame_time, **snapshot})
+        self.frames += 1
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+def read_session(path: str) -> tuple[dict, Iterator[dict]]:
+    """
+    The header of a recorded session and an iterator over its frames.
+    """
+    file = gzip.open(path, "rt", encoding="utf-8")
+    header = json.loads(file.readline())
+    if header.get("version") != REPLAY_VERSION:
+        file.close()
+        raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+
+    def frames() -> Iterator[dict]:
+        with file:
+            for line in file:
+                yield json.loads(line)
+
+    return header, frames()
+
+
+def replay(path: str, csv_path: str = "replay.csv") -> dict:
+    """
+    Run a recorded session headless, frame by frame, and return the profiler's percentiles per scene.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from main import Game
+
+    header, frames = read_session(path)
+    random.seed(header["seed"])
+    game = Game(settings=header["settings"])
+    game.sceneManager.saves.use_fixture(header["save"])
+    game.profiler.csvPath = csv_path
+    game.profiler.toggle_csv()
+    for frame in frames:
+        game.step([], frame["dt"], frame)
+        # The session ended with the menu's Exit
+        if not game.running:
+            break
+    game.profiler.close()
+    game.sceneManager.saves.close()
+    report = game.profiler.report()
+    pygame.quit()
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a recorded session headless")
+    parser.add_argument("session")
+    parser.add_argument("--csv", default="replay.csv", help="per frame timings")
+    args = parser.parse_args()
+    session = os.path.abspath(args.session)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    print(json.dumps(replay(session, args.csv), indent=2))
@@ -0,0 +1,117 @@
+from __future__ import annotations
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor, Future
+from copy import deepcopy
+from os.path import exists
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from scene import SceneManager
+
+SAVES_PATH = "../Saves"
+SAVE_EXTENSION = ".sav"
+SAVE_VERSION = 1
+AUTOSAVE_SLOT = "autosave"
+
+
+def save_path(slot: str, saves_path: str = SAVES_PATH) -> str:
+    return f"{saves_path}/{slot}{SAVE_EXTENSION}"
+
+
+def write_save(path: str, snapshot: dict) -> int:
+    """
+    Serialise, compress and write a snapshot, replacing the old save only once the new one is complete.
+    """
+    payload = zlib.compress(json.dumps(snapshot, separators=(",", ":")).encode("utf-8"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(payload)
+    os.replace(temporary, path)
+    return len(payload)
+
+
+class PendingScene:
+    """
+    Placeholder for a scene of a loaded stack below the top one. It is built when it becomes the top scene.
+    """
+    poolable = False
+    renderer = None
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class SaveManager:
+    """
+    Snapshots the inventory, player position and scene stack on the main thread and leaves serialising and
+    writing them to a worker thread, so saving never holds up a frame.
+    Read only managers never touch the disk, they only offer their fixture, if any, as the save.
+    """
+
+    def __init__(self, saves_path: str = SAVES_PATH, read_only: bool = False):
+        self.savesPath = saves_path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save")
+        self.pending: list[Future] = []
+        # Set by replays: the save the session started with, nothing is written to disk
+        self.fixture: Optional[dict] = None
+        self.readOnly = read_only
+
+    def use_fixture(self, snapshot: Optional[dict]):
+        self.fixture = snapshot
+        self.readOnly = True
+
+    @staticmethod
+    def snapshot(manager: SceneManager) -> Optional[dict]:
+        stack = [scene for scene in manager.sceneStack if not isinstance(scene, PendingScene)]
+        if not stack:
+            return None
+        player = stack[-1].player
+        # Deep copied so the game can keep changing the inventory while the worker serialises it
+        return {
+            "version": SAVE_VERSION,
+            "stack": [scene.name for scene in manager.sceneStack],
+            "inventory": deepcopy(player.itemInventory),
+            "position": [player.position.x, player.position.y],
+            "xp": player.xp,
+            "level": player.level
+        }
+
+    def save(self, manager: SceneManager, slot: str = AUTOSAVE_SLOT) -> Optional[Future]:
+        snapshot = None if self.readOnly else self.snapshot(manager)
+        if snapshot is None:
+            return None
+        self.pending = [future for future in self.pending if not future.done()]
+        future = self.executor.submit(write_save, save_path(slot, self.savesPath), snapshot)
+        self.pending.append(future)
+        return future
+
+    def exists(self, slot: str = AUTOSAVE_SLOT) -> bool:
+        if self.readOnly:
+            return self.fixture is not None
+        return exists(save_path(slot, self.savesPath))
+
+    def load(self, slot: str = AUTOSAVE_SLOT) -> Optional[dict]:
+        if self.readOnly:
+            return deepcopy(self.fixture)
+        path = save_path(slot, self.savesPath)
+        # A save still being written to the same slot has to land first
+        self.wait()
+        if not exists(path):
+            return None
+        with open(path, "rb") as file:
+            snapshot = json.loads(zlib.decompress(file.read()).decode("utf-8"))
+        if snapshot.get("version") != SAVE_VERSION:
+            return None
+        return snapshot
+
+    def wait(self):
+        for future in self.pending:
+            future.result()
+        self.pending.clear()
+
+    def close(self):
+        self.wait()
+        self.executor.shutdown()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+import pygame
+from collections import deque
+from typing import Optional
+from weakref import WeakKeyDictionary
+from settings import get_setting, RENDER_SCALE, ADAPTIVE_SCALE, FPS_CAP
+
+# Scales are kept to multiples of this step, so tile sized images scale to whole pixels
+SCALE_STEP = 0.125
+MIN_RENDER_SCALE = 0.5
+# Frames averaged, and frames waited after a change, before the adaptive mode changes the scale again
+ADAPT_WINDOW = 60
+
+
+def quantize(scale: float) -> float:
+    return min(1.0, max(MIN_RENDER_SCALE, round(scale / SCALE_STEP) * SCALE_STEP))
+
+
+class ScaledImages:
+    """
+    Copies of sprite images scaled to the render scale, keyed by surface. Dropped when the scale changes.
+    """
+
+    def __init__(self, scale: float = 1.0):
+        self.scale = scale
+        self.images: WeakKeyDictionary[pygame.Surface, pygame.Surface] = WeakKeyDictionary()
+
+    def set_scale(self, scale: float):
+        if scale != self.scale:
+            self.scale = scale
+            self.images.clear()
+
+    def get(self, surface: pygame.Surface) -> pygame.Surface:
+        if self.scale == 1.0:
+            return surface
+        image = self.images.get(surface)
+        if image is None:
+            width, height = surface.get_size()
+            image = pygame.transform.scale(surface, (max(1, round(width * self.scale)),
+                                                     max(1, round(height * self.scale))))
+            self.images[surface] = image
+        return image
+
+
+class RenderScaler:
+    """
+    Internal resolution of the world. Scenes draw the world into canvas, which is scaled up to the display
+    once per frame, and draw their HUD and buttons straight onto the display at native resolution.
+    In adaptive mode the scale is lowered or raised from the measured frame time to hold target_fps.
+    """
+
+    def __init__(self, display: pygame.Surface, scale: Optional[float] = None, adaptive: Optional[bool] = None,
+                 target_fps: Optional[int] = None):
+        self.display = display
+        if scale is None:
+            scale = float(get_setting("performance", "render_scale", RENDER_SCALE))
+        if adaptive is None:
+            adaptive = get_setting("performance", "adaptive_scale", str(ADAPTIVE_SCALE)).lower() == "true"
+        if target_fps is None:
+            target_fps = int(get_setting("performance", "fps_cap", FPS_CAP)) or FPS_CAP
+        self.adaptive = adaptive
+        self.budget = 1000 / target_fps
+        self.frameTimes: deque[float] = deque(maxlen=ADAPT_WINDOW)
+        self.images = ScaledImages()
+        self.scale = 1.0
+        self.canvas = display
+        self.set_scale(scale)
+
+    def set_scale(self, scale: float):
+        scale = quantize(scale)
+        self.scale = scale
+        self.images.set_scale(scale)
+        if scale == 1.0:
+            self.canvas = self.display
+        else:
+            width, height = self.display.get_size()
+            self.canvas = pygame.Surface((round(width * scale), round(height * scale))).convert()
+        self.frameTimes.clear()
+
+    def present(self):
+        """
+        Scale the world canvas up onto the display.
+        """
+        if self.canvas is not self.display:
+            pygame.transform.scale(self.canvas, self.display.get_size(), self.display)
+
+    def adapt(self, frame_ms: float):
+        """
+        Record the time spent working on a frame, without the time waiting for the frame cap.
+        """
+        if not self.adaptive:
+            return
+        self.frameTimes.append(frame_ms)
+        if len(self.frameTimes) < ADAPT_WINDOW:
+            return
+        average = sum(self.frameTimes) / len(self.frameTimes)
+        if average > self.budget * 0.9 and self.scale > MIN_RENDER_SCALE:
+            self.set_scale(self.scale - SCALE_STEP)
+        elif average < self.budget * 0.6 and self.scale < 1.0:
+            self.set_scale(self.scale + SCALE_STEP)
+        else:
+            self.frameTimes.clear()
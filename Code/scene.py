@@ -2,17 +2,40 @@ from __future__ import annotations
 import pygame
 import json
 from player import Player
-from pytmx import load_pygame, TiledMap, TiledTileLayer
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from sprites import Generic, Interaction, Tile, Cable, ColorLine, ColorLineCursor
-from constants import BG_COLOR, BLUE
+from constants import BG_COLOR, BLUE, TILE_SIZE
 from os.path import exists
 import random
 from overlay import Overlay
 from buttons import Button
+from ui import UILayer
+from render_queue import RenderQueue
+from spatial import SpatialGrid, CollisionGroup
+from tiles import TileLayer
+from chunks import chunk_cache
+from assets import asset_cache, surface_bytes
+from loader import SceneLoader, SCENES_PATH
+from mapbundle import MapBundle, BundleTileLayer, COMPILED_PATH, bundle_path, compile_scene, is_fresh
+from navigation import NavGrid
+from streaming import ChunkStreamer, ChunkData, STREAM_RADIUS, UNLOAD_MARGIN
+from dirty import DirtyRenderer
+from profiler import FrameProfiler
+from input_stream import InputStream, EventRouter
+from settings import get_setting, DIRTY_RECTS
+from scene_pool import ScenePool
+from scaling import RenderScaler
+from save import SaveManager, PendingScene, AUTOSAVE_SLOT
+from time import perf_counter
+
+if TYPE_CHECKING:
+    from pytmx import TiledMap
 
 
 class Scene:
+    # Whether the scene can be kept suspended in the pool after it is exited
+    poolable = False
+
     def __init__(self, display: pygame.Surface, player_inventory: Optional[dict], name: str, data: dict,
                  manager: SceneManager) -> None:
         # Save parameters
@@ -21,10 +44,11 @@ class Scene:
         self.manager = manager
         # Import data
         self.data = data
-        self.tmx = TiledMap()
+        # Scenes with a map load it in load_tmx
+        self.tmx: Optional[TiledMap | MapBundle] = None
         # Sprites
-        self.collisionSprites = pygame.sprite.Group()
-        self.interactionSprites = pygame.sprite.Group()
+        self.collisionSprites = CollisionGroup("hitbox")
+        self.interactionSprites = CollisionGroup("rect")
         if "layers" in self.data.keys():
             self.allSprites = CameraGroup(display, self.data["layers"])
             self.player = Player(None, self.manager, self.data["layers"]["main"]["index"], self.collisionSprites,
@@ -34,11 +58,20 @@ class Scene:
             self.player = Player(None, self.manager, 1, self.collisionSprites, self.interactionSprites, self.allSprites)
 
         if self.data["bg_image_path"] != "":
-            Generic((0, 0), pygame.image.load(self.data["bg_image_path"]), self.data["layers"]["Background"]["index"],
-                    self.allSprites)
+            background = asset_cache.image(self.data["bg_image_path"], alpha=False)
+            Generic((0, 0), background, self.data["layers"]["Background"]["index"], self.allSprites)
 
         if player_inventory:
             self.player.itemInventory = player_inventory
+        # Set by scenes that opt into dirty rectangle rendering
+        self.renderer: Optional[DirtyRenderer] = None
+        # Event handlers by event type
+        self.router = EventRouter()
+        self.subscribe_events()
+
+    def use_dirty_rects(self, background) -> None:
+        if get_setting("performance", "dirty_rects", str(DIRTY_RECTS)).lower() == "true":
+            self.renderer = DirtyRenderer(self.display, background)
 
     def set_player(self):
         self.player.collisionSprites = self.collisionSprites
@@ -49,10 +82,59 @@ class Scene:
     def setup(self) -> None:
         ...
 
+    def suspend(self) -> None:
+        """
+        Called when the scene goes into the pool, the player stops where it was.
+        """
+        self.player.direction.update(0, 0)
+
+    def resume(self, player_inventory: Optional[dict]) -> None:
+        """
+        Reattach the player to a scene taken back from the pool.
+        """
+        if player_inventory:
+            self.player.itemInventory = player_inventory
+
+    def close(self) -> None:
+        """
+        Called when the scene is dropped from the pool. Its baked chunks are released with it, so the pool's
+        byte budget is actually freed, and a compiled map is unmapped.
+        """
+        if self.data.get("tmx_path"):
+            chunk_cache.invalidate(self.data["tmx_path"])
+        if isinstance(self.tmx, MapBundle):
+            self.tmx.close()
+
+    def memory_estimate(self) -> int:
+        """
+        Bytes of the distinct surfaces drawn by the scene.
+        """
+        surfaces = {id(sprite.image): sprite.image for sprite in self.allSprites}
+        return sum(surface_bytes(surface) for surface in surfaces.values())
+
+    def subscribe_events(self) -> None:
+        self.router.subscribe(pygame.KEYDOWN, self.player.on_key_down)
+
     def event_loop(self, event: pygame.event.Event) -> None:
-        self.player.input(event)
+        self.router.dispatch(event)
 
-    def render(self, dt: float) -> None:
+    def handle_input(self, input_stream: InputStream) -> None:
+        """
+        Per frame input, run once after the frame's events were dispatched.
+        """
+        self.player.input(input_stream)
+
+    def update(self, dt: float) -> None:
+        """
+        Advance the simulation by one fixed step of dt seconds.
+        """
+        ...
+
+    def render(self, alpha: float) -> Optional[list]:
+        """
+        Draw the frame, alpha of the way between the last two simulation steps.
+        Scenes drawing with dirty rects return the regions to update, others update everything.
+        """
         ...
 
     def load_data(self) -> None:
@@ -64,15 +146,18 @@ class Scene:
 
     def load_tmx(self) -> None:
         if exists(self.data["tmx_path"]):
-            self.tmx = load_pygame(self.data["tmx_path"])
+            self.tmx = self.manager.loader.load_map(self.data["tmx_path"])
 
 
 class MainScene(Scene):
+    poolable = True
+
     def __init__(self, display: pygame.surface, data: dict, manager: SceneManager):
         super().__init__(display, None, "main_scene", data, manager)
         self.load_tmx()
         self.setup()
         self.overlay = Overlay(self.player, self.display)
+        self.navigation = NavGrid(self.collisionSprites, self.tmx.width, self.tmx.height)
 
     def setup(self) -> None:
         for obj in self.tmx.objects:
@@ -85,14 +170,24 @@ class MainScene(Scene):
                             self.data["interactive"][obj.name]["action"], (obj.width, obj.height),
                             self.interactionSprites)
 
-    def render(self, dt: float) -> None:
-        self.display.fill(BG_COLOR)
+    def update(self, dt: float) -> None:
         self.allSprites.update(dt)
-        self.allSprites.custom_draw(self.player)
-        self.overlay.display()
+
+    def render(self, alpha: float) -> None:
+        profiler = self.manager.profiler
+        with profiler.phase("draw"):
+            # The world is drawn at the render scale, the overlay at native resolution
+            scaler = self.manager.scaler
+            scaler.canvas.fill(BG_COLOR)
+            self.allSprites.custom_draw(self.player, alpha, scaler)
+            scaler.present()
+        with profiler.phase("overlay"):
+            self.overlay.display()
 
 
 class PlayableScene(Scene):
+    poolable = True
+
     def __init__(self, display: pygame.surface, player_inventory: dict, name: str, data: dict, manager: SceneManager):
         super().__init__(display, player_inventory, name, data, manager)
         self.load_tmx()
@@ -104,28 +199,169 @@ class PlayableScene(Scene):
                             self.data["interactive"][obj.name]["action"], (obj.width, obj.height),
                             self.interactionSprites)
 
+        from pytmx import TiledTileLayer
+
+        main_index = self.data["layers"]["main"]["index"]
+        self.tileLayers: dict[str, TileLayer] = {}
         for layer in self.tmx.visible_layers:
-            if isinstance(layer, TiledTileLayer):
+            if isinstance(layer, (TiledTileLayer, BundleTileLayer)):
                 layer: TiledTileLayer
-                for x, y, surface in layer.tiles():
-                    pos = (x * 64, y * 64)
-                    layer_data = self.data["layers"][layer.name]
-                    groups = self.allSprites if not layer_data["collision"] else [self.allSprites,
-                                                                                  self.collisionSprites]
-                    Tile(surface, pos, layer_data["index"], groups)
+                layer_data = self.data["layers"][layer.name]
+                tile_layer = TileLayer.from_layer(layer, layer_data["index"])
+                self.tileLayers[layer.name] = tile_layer
+                # Collision is resolved against the gid array, no per tile collision sprites
+                if layer_data["collision"]:
+                    self.collisionSprites.add_layer(tile_layer)
+                # Layers drawn on the actors' z keep one sprite per tile so they stay y-sorted with them
+                if layer_data["index"] != main_index and chunk_cache.is_static(layer):
+                    for position, surface in chunk_cache.bake(self.data["tmx_path"], layer):
+                        Generic(position, surface, layer_data["index"], self.allSprites)
+                    continue
+                for x, y, surface in tile_layer.tiles():
+                    Tile(surface, (x * TILE_SIZE, y * TILE_SIZE), layer_data["index"], self.allSprites)
+        # Walkability for NPCs, kept in step with the collision layers and hitboxes
+        self.navigation = NavGrid(self.collisionSprites, self.tmx.width, self.tmx.height)
+
+        spawn = self.tmx.get_object_by_name("Player")
+        self.spawn = (spawn.x, spawn.y)
+        self.player.position = pygame.math.Vector2(self.spawn)
+
+    def resume(self, player_inventory: Optional[dict]) -> None:
+        super().resume(player_inventory)
+        self.player.position.update(self.spawn)
+
+    def update(self, dt: float) -> None:
+        self.allSprites.update(dt)
 
-        self.player.position = self.tmx.get_object_by_name("Player")
+    def render(self, alpha: float) -> None:
+        profiler = self.manager.profiler
+        with profiler.phase("draw"):
+            # The world is drawn at the render scale, the overlay at native resolution
+            scaler = self.manager.scaler
+            scaler.canvas.fill(BG_COLOR)
+            self.allSprites.custom_draw(self.player, alpha, scaler)
+            scaler.present()
+        with profiler.phase("overlay"):
+            self.overlay.display()
+
+
+class StreamingScene(Scene):
+    """
+    A world too large to load at once. The map is read from its compiled bundle in chunks: chunks around
+    the camera are built on a worker thread, chunks far from it are dropped along with their sprites
+    and collision layers, so memory does not grow with the size of the world.
+    """
+    poolable = True
 
-    def render(self, dt: float) -> None:
-        self.display.fill(BG_COLOR)
+    def __init__(self, display: pygame.surface, player_inventory: dict, name: str, data: dict, manager: SceneManager):
+        super().__init__(display, player_inventory, name, data, manager)
+        self.load_tmx()
+        self.overlay = Overlay(self.player, self.display)
+        self.streamer = ChunkStreamer(self.tmx, self.data["layers"], self.data["layers"]["main"]["index"])
+        # Sprites and collision layers of every loaded chunk
+        self.chunks: dict[tuple[int, int], tuple[list, list]] = {}
+
+        spawn = self.tmx.get_object_by_name("Player")
+        self.spawn = (spawn.x, spawn.y)
+        self.player.position = pygame.math.Vector2(self.spawn)
+        self.stream(True)
+
+    def load_tmx(self) -> None:
+        loader = self.manager.loader
+        tmx = loader.maps.pop(self.data["tmx_path"], None)
+        if not isinstance(tmx, MapBundle):
+            compiled_path = COMPILED_PATH if loader.scenesPath == SCENES_PATH else f"{loader.scenesPath}/Compiled"
+            if not is_fresh(self.name, self.data, loader.scenesPath, compiled_path):
+                compile_scene(self.name, loader.scenesPath, compiled_path)
+            tmx = MapBundle(bundle_path(self.name, compiled_path))
+            tmx.load_images()
+        self.tmx = tmx
+
+    def view(self) -> pygame.Rect:
+        # The camera is centred on the player
+        return self.display.get_rect(center=self.player.position)
+
+    def stream(self, wait: bool = False) -> None:
+        """
+        Request the chunks around the camera, add the ones that are built and drop the distant ones.
+        Chunks on screen are waited for, or with wait every chunk that is wanted.
+        """
+        streamer = self.streamer
+        view = self.view()
+        visible = streamer.chunks_around(view, 0)
+        wanted = streamer.chunks_around(view, STREAM_RADIUS)
+        keep = streamer.chunks_around(view, STREAM_RADIUS + UNLOAD_MARGIN)
+        for key in wanted:
+            if key not in self.chunks:
+                streamer.request(key)
+        for key in list(streamer.pending):
+            if key not in keep:
+                streamer.cancel(key)
+                continue
+            chunk = streamer.take(key, wait or key in visible)
+            if chunk:
+                self.load_chunk(chunk)
+        for key in [key for key in self.chunks if key not in keep]:
+            self.unload_chunk(key)
+
+    def load_chunk(self, chunk: ChunkData) -> None:
+        sprites = [Generic(position, surface, z, self.allSprites) for position, surface, z in chunk.baked]
+        sprites += [Tile(surface, position, z, self.allSprites) for position, surface, z in chunk.tiles]
+        main_index = self.data["layers"]["main"]["index"]
+        for obj in chunk.objects:
+            position = obj.x, obj.y
+            if obj.__getattribute__("class") in "Building" and obj.image:
+                sprites.append(Generic(position, obj.image, main_index, self.allSprites, self.collisionSprites))
+            if obj.__getattribute__("class") in "Trigger":
+                sprites.append(Interaction(position, obj.name, self.data["interactive"][obj.name]["type"],
+                                           self.data["interactive"][obj.name]["action"], (obj.width, obj.height),
+                                           self.interactionSprites))
+        for layer in chunk.layers:
+            self.collisionSprites.add_layer(layer)
+        self.chunks[chunk.key] = (sprites, chunk.layers)
+
+    def unload_chunk(self, key: tuple[int, int]) -> None:
+        sprites, layers = self.chunks.pop(key)
+        for sprite in sprites:
+            sprite.kill()
+        for layer in layers:
+            self.collisionSprites.remove_layer(layer)
+
+    def close(self) -> None:
+        # The worker reads the bundle, it has to stop before the bundle is unmapped
+        self.streamer.close()
+        super().close()
+
+    def suspend(self) -> None:
+        super().suspend()
+        # Chunks already loaded stay, builds that have not started are dropped
+        for key in list(self.streamer.pending):
+            self.streamer.cancel(key)
+
+    def resume(self, player_inventory: Optional[dict]) -> None:
+        super().resume(player_inventory)
+        self.player.position.update(self.spawn)
+        self.stream(True)
+
+    def update(self, dt: float) -> None:
+        self.stream()
         self.allSprites.update(dt)
-        self.allSprites.custom_draw(self.player)
-        self.overlay.display()
+
+    def render(self, alpha: float) -> None:
+        profiler = self.manager.profiler
+        with profiler.phase("draw"):
+            # The world is drawn at the render scale, the overlay at native resolution
+            scaler = self.manager.scaler
+            scaler.canvas.fill(BG_COLOR)
+            self.allSprites.custom_draw(self.player, alpha, scaler)
+            scaler.present()
+        with profiler.phase("overlay"):
+            self.overlay.display()
 
 
 class CableScene(Scene):
     def __init__(self, display: pygame.surface.Surface, player_inventory: dict, data: dict, manager):
-        super().__init__(display, player_inventory, "cable", data, manager)
+        super().__init__(display, player_inventory, "cable_scene", data, manager)
         self.standards = self.data["standards"]
         self.cableOrder = self.standards["T568A"]
         self.allSprites = pygame.sprite.Group()
@@ -135,6 +371,7 @@ class CableScene(Scene):
         self.mouse_offset = 0
         self.ordered = False
         self.setup()
+        self.use_dirty_rects("#1e1e1e")
 
     def setup(self):
         # Randomize cable order
@@ -150,13 +387,13 @@ class CableScene(Scene):
             else:
                 assets_path += "Strip"
             assets_path += "_" + cableName[1:] + ".png"
-            image = pygame.image.load(assets_path).convert_alpha()
+            image = asset_cache.image(assets_path)
             Cable(position, cableName, image, self.allSprites)
 
         # ImageButton((self.gameCanvas.get_width() / 2, self.gameCanvas.get_height() - 100), "Assets/Images/Pin.png",
         #             self.barSprites)
-        colors = pygame.image.load("../Assets/Scenes/CableScene/LineColor.png").convert_alpha()
-        cursor = pygame.image.load("../Assets/Scenes/CableScene/ColorCursor.png").convert_alpha()
+        colors = asset_cache.image("../Assets/Scenes/CableScene/LineColor.png")
+        cursor = asset_cache.image("../Assets/Scenes/CableScene/ColorCursor.png")
 
         ColorLineCursor((self.display.get_width() / 2, 100), cursor,
                         ColorLine((self.display.get_width() / 2, 100), colors, self.barSprites), self.barSprites)
@@ -167,28 +404,26 @@ class CableScene(Scene):
                 self.ordered = True
 
     def drag_start(self, event: pygame.event.Event):
-        mouse_x, mouse_y = pygame.mouse.get_pos()
+        mouse_x, mouse_y = event.pos
 
         for cable in self.allSprites:
             if isinstance(cable, Cable):
                 if cable.rect.collidepoint(mouse_x, mouse_y):
-
-                    if event.type == pygame.MOUSEBUTTONDOWN:
-                        self.dragging = True
-                        self.mouse_offset = mouse_y - cable.rect.y
-                        self.selectedCable = cable
+                    self.dragging = True
+                    self.mouse_offset = mouse_y - cable.rect.y
+                    self.selectedCable = cable
 
     def drag_end(self, event: pygame.event.Event):
-        if event.type == pygame.MOUSEBUTTONUP and self.selectedCable:
+        if self.selectedCable:
             if self.dragging:
                 self.dragging = False
                 self.selectedCable.rect.centery = self.selectedCable.position.y
                 self.check_cable_order()
                 self.selectedCable = None
 
-    def on_dragging(self):
+    def on_dragging(self, mouse_position: tuple):
         if self.dragging:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
+            mouse_x, mouse_y = mouse_position
             self.selectedCable.rect.y = mouse_y - self.mouse_offset
 
             for cable in self.allSprites:
@@ -202,10 +437,13 @@ class CableScene(Scene):
                             self.cableOrder[i1], self.cableOrder[i2] = self.cableOrder[i2], self.cableOrder[i1]
                             cable.position, self.selectedCable.position = self.selectedCable.position, cable.position
 
-    def event_loop(self, event: pygame.event.Event):
-        self.allSprites.update()
+    def subscribe_events(self) -> None:
+        self.router.subscribe(pygame.MOUSEBUTTONDOWN, self.drag_start)
+        self.router.subscribe(pygame.MOUSEBUTTONUP, self.drag_end)
+        self.router.subscribe(pygame.KEYDOWN, self.check_cursor)
+
+    def check_cursor(self, event: pygame.event.Event):
         if self.ordered:
-            self.barSprites.update()
             for sprite in self.barSprites:
                 if isinstance(sprite, ColorLineCursor):
                     quality = sprite.check_cursor(event)
@@ -214,19 +452,31 @@ class CableScene(Scene):
                         self.player.add_item("money", 10)
                         self.manager.exit_level()
 
-        self.drag_start(event)
-        self.on_dragging()
-        self.drag_end(event)
+    def handle_input(self, input_stream: InputStream):
+        self.allSprites.update()
+        if self.ordered:
+            self.barSprites.update()
+        self.on_dragging(input_stream.mouse.position)
 
-    def render(self, dt: float):
-        self.display.fill("#1e1e1e")
-        self.allSprites.draw(self.display)
+    def update(self, dt: float) -> None:
         if self.ordered:
-            self.barSprites.draw(self.display)
             for sprite in self.barSprites:
                 if isinstance(sprite, ColorLineCursor):
                     sprite.animate(dt)
 
+    def render(self, alpha: float) -> Optional[list]:
+        with self.manager.profiler.phase("draw"):
+            if self.renderer:
+                sprites = self.allSprites.sprites()
+                if self.ordered:
+                    sprites += self.barSprites.sprites()
+                return self.renderer.draw(sprites)
+            self.display.fill("#1e1e1e")
+            self.allSprites.draw(self.display)
+            if self.ordered:
+                self.barSprites.draw(self.display)
+        return None
+
 
 class CameraGroup(pygame.sprite.Group):
     def __init__(self, display: pygame.Surface, layers: dict):
@@ -236,31 +486,105 @@ class CameraGroup(pygame.sprite.Group):
         self.width = display.get_width()
         self.height = display.get_height()
         self.layers = layers
-
-    def custom_draw(self, player: Player):
-        self.offset.x = player.rect.centerx - self.width / 2
-        self.offset.y = player.rect.centery - self.height / 2
-
-        lay = []
-
-        for value in self.layers.values():
-            value: dict
-            lay.append(value["index"])
-
-        for layer in lay:
-            for sprite in sorted(self.sprites(), key=lambda l: l.rect.centery):
-                sprite: Generic
-                if sprite.z == layer:
-                    offset_rect = sprite.rect.copy()
-                    offset_rect.center -= self.offset
-                    self.display.blit(sprite.image, offset_rect)
+        self.queue = RenderQueue(value["index"] for value in layers.values())
+        # Sprites are queued on the first draw after being added, once their rect and z are set
+        self.pending: list[pygame.sprite.Sprite] = []
+        # Only sprites that override update can move, the rest keep their place in the queue
+        self.dynamic: set[pygame.sprite.Sprite] = set()
+        # Spatial index of sprite rects, used to cull everything outside the viewport
+        self.grid = SpatialGrid()
+        self.viewport = pygame.Rect(0, 0, self.width, self.height)
+        # Top left of every moving sprite before the last simulation step, to interpolate drawing
+        self.previous: dict[pygame.sprite.Sprite, tuple[int, int]] = {}
+
+    def add_internal(self, sprite: pygame.sprite.Sprite, layer=None):
+        super().add_internal(sprite)
+        self.pending.append(sprite)
+        if type(sprite).update is not pygame.sprite.Sprite.update:
+            self.dynamic.add(sprite)
+
+    def remove_internal(self, sprite: pygame.sprite.Sprite):
+        super().remove_internal(sprite)
+        self.queue.remove(sprite)
+        self.grid.remove(sprite)
+        self.dynamic.discard(sprite)
+        self.previous.pop(sprite, None)
+
+    def update(self, *args, **kwargs):
+        self.previous = {sprite: sprite.rect.topleft for sprite in self.dynamic}
+        super().update(*args, **kwargs)
+
+    def interpolated(self, sprite: pygame.sprite.Sprite, alpha: float) -> tuple[int, int]:
+        """
+        Top left of a sprite alpha of the way from where it was before the last step to where it is now.
+        """
+        x, y = sprite.rect.topleft
+        previous = self.previous.get(sprite)
+        if previous is None:
+            return x, y
+        return round(previous[0] + (x - previous[0]) * alpha), round(previous[1] + (y - previous[1]) * alpha)
+
+    def flush(self):
+        for sprite in self.pending:
+            if sprite in self.spritedict:
+                self.queue.add(sprite)
+                self.grid.insert(sprite, sprite.rect)
+        self.pending.clear()
+        self.queue.refresh(self.dynamic)
+        for sprite in self.dynamic:
+            self.grid.move(sprite, sprite.rect)
+
+    def visible_sprites(self) -> list:
+        """
+        Sprites intersecting the viewport, in draw order.
+        """
+        viewport = self.viewport
+        candidates = [sprite for sprite in self.grid.query(viewport) if viewport.colliderect(sprite.rect)]
+        return self.queue.ordered(candidates)
+
+    def custom_draw(self, player: Player, alpha: float = 1.0, scaler: Optional[RenderScaler] = None):
+        player_x, player_y = self.interpolated(player, alpha)
+        self.offset.x = player_x + player.rect.width // 2 - self.width / 2
+        self.offset.y = player_y + player.rect.height // 2 - self.height / 2
+        self.flush()
+
+        offset_x = int(self.offset.x)
+        offset_y = int(self.offset.y)
+        self.viewport.topleft = (offset_x, offset_y)
+        previous = self.previous
+        blits = []
+        if scaler is None or scaler.scale == 1.0:
+            for sprite in self.visible_sprites():
+                if sprite in previous:
+                    x, y = self.interpolated(sprite, alpha)
+                else:
+                    x, y = sprite.rect.topleft
+                blits.append((sprite.image, (x - offset_x, y - offset_y)))
+            (scaler.canvas if scaler else self.display).blits(blits, doreturn=False)
+            return
+
+        scale = scaler.scale
+        scaled = scaler.images.get
+        for sprite in self.visible_sprites():
+            if sprite in previous:
+                x, y = self.interpolated(sprite, alpha)
+            else:
+                x, y = sprite.rect.topleft
+            blits.append((scaled(sprite.image), (round((x - offset_x) * scale), round((y - offset_y) * scale))))
+        scaler.canvas.blits(blits, doreturn=False)
 
 
 class SceneManager:
-    def __init__(self, display: pygame.Surface):
+    def __init__(self, display: pygame.Surface, scenes_path: str = SCENES_PATH, saves: Optional[SaveManager] = None):
         self.display = display
         self.sceneData = dict
         self.sceneStack: list[Scene] = []
+        self.loader = SceneLoader(scenes_path)
+        self.pool = ScenePool()
+        self.profiler = FrameProfiler()
+        self.input = InputStream()
+        self.scaler = RenderScaler(display)
+        self.saves = saves if saves is not None else SaveManager()
         # overlay image
         self.image = pygame.Surface((display.get_width(), display.get_height()))
         self.color = 255
@@ -269,35 +593,89 @@ class SceneManager:
         self.start = False
         self.enter = False
         self.exit = False
+        self.quitRequested = False
 
     def change_scene(self):
-        if self.name == "exit":
-            pygame.quit()
-            exit()
+        # The menu's Exit and Continue are names entered like scenes, a later exit_level keeps the name
+        if self.enter and self.name == "exit":
+            # Game quits once the frame is over, closing the saves, profiler and recorder
+            self.quitRequested = True
+            return
+        if self.enter and self.name == "continue":
+            self.continue_game()
+            return
 
         if self.enter:
-            with open(f"../Data/Scenes/{self.name}.json", "r") as data:
-                self.sceneData = json.load(data)
-            if self.sceneData["class"] == "MainScene":
-                scene = MainScene(self.display, self.sceneData, self)
-            if self.sceneData["class"] == "PlayableScene":
-                scene = PlayableScene(self.display, self.sceneStack[-1].player.itemInventory, self.name, self.sceneData,
-                                      self)
-            if self.sceneData["class"] == "CableScene":
-                scene = CableScene(self.display, self.sceneStack[-1].player.itemInventory, self.sceneData, self)
-            if self.sceneData["class"] == "Menu":
-                scene = Menu(self.display, self.sceneData, self)
-
-            self.sceneStack.append(scene)
+            inventory = self.sceneStack[-1].player.itemInventory if self.sceneStack else None
+            self.sceneStack.append(self.build_scene(self.name, inventory))
         if self.exit:
-            self.sceneStack[-2].player.itemInventory = self.sceneStack[-1].player.itemInventory
+            scene = self.sceneStack.pop()
             if self.sceneStack:
-                self.sceneStack.pop()
+                # Scenes restored from a save are only built once they are returned to
+                if isinstance(self.sceneStack[-1], PendingScene):
+                    self.sceneStack[-1] = self.build_scene(self.sceneStack[-1].name, scene.player.itemInventory)
+                self.sceneStack[-1].player.itemInventory = scene.player.itemInventory
+            if scene.poolable:
+                self.pool.put(scene)
+
+    def build_scene(self, name: str, inventory: Optional[dict]) -> Scene:
+        start = perf_counter()
+        scene = self.pool.take(name)
+        if scene:
+            self.loader.discard(name)
+            scene.resume(inventory)
+            self.pool.record(True, (perf_counter() - start) * 1000)
+            return scene
+
+        self.sceneData = self.loader.take(name).data
+        build_start = perf_counter()
+        if self.sceneData["class"] == "MainScene":
+            scene = MainScene(self.display, self.sceneData, self)
+        if self.sceneData["class"] == "PlayableScene":
+            scene = PlayableScene(self.display, inventory, name, self.sceneData, self)
+        if self.sceneData["class"] == "StreamingScene":
+            scene = StreamingScene(self.display, inventory, name, self.sceneData, self)
+        if self.sceneData["class"] == "CableScene":
+            scene = CableScene(self.display, inventory, self.sceneData, self)
+        if self.sceneData["class"] == "Menu":
+            scene = Menu(self.display, self.sceneData, self)
+        self.loader.record(name, "build", (perf_counter() - build_start) * 1000)
+        self.pool.record(False, (perf_counter() - start) * 1000)
+        return scene
+
+    def continue_game(self, slot: str = AUTOSAVE_SLOT) -> bool:
+        """
+        Restore a saved scene stack. Only the top scene is built, the rest wait as placeholders.
+        """
+        snapshot = self.load_save(slot)
+        if snapshot is None:
+            return False
+        *below, top = snapshot["stack"]
+        scene = self.build_scene(top, snapshot["inventory"])
+        scene.player.itemInventory = snapshot["inventory"]
+        scene.player.position.update(snapshot["position"])
+        scene.player.xp = snapshot["xp"]
+        scene.player.level = snapshot["level"]
+        self.sceneStack = [PendingScene(name) for name in below] + [scene]
+        return True
+
+    def load_save(self, slot: str = AUTOSAVE_SLOT) -> Optional[dict]:
+        """
+        The save of a slot, or None if a scene of its stack is not among this manager's scenes.
+        """
+        snapshot = self.saves.load(slot)
+        if snapshot is None:
+            return None
+        if not all(exists(f"{self.loader.scenesPath}/{name}.json") for name in snapshot["stack"]):
+            return None
+        return snapshot
+
+    def prefetch(self, name: str):
+        if name not in self.pool:
+            self.loader.prefetch(name)
 
     def enter_scene(self, name: str):
         self.name = name
-        if name == "exit":
-            self.change_scene()
         self.start = True
         self.enter = True
 
@@ -321,34 +699,100 @@ class SceneManager:
         self.start = True
         self.exit = True
 
-    def render(self, dt: float):
+    def apply_transition(self):
+        """
+        Apply a pending transition, the fade used to do it. Game does so once every frame, even on frames too
+        short for a fixed step, so the first frame already builds the main menu.
+        """
+        if self.start:
+            self.change_scene()
+            self.start = False
+            self.enter = False
+            self.exit = False
+            # Autosave on every transition into the game, the worker thread does the writing
+            if self.sceneStack and not isinstance(self.sceneStack[-1], Menu):
+                self.saves.save(self)
+            # The scene now on top has to draw a whole frame
+            if self.sceneStack and self.sceneStack[-1].renderer:
+                self.sceneStack[-1].renderer.invalidate()
+            self.profiler.status["pool"] = self.pool.summary()
+
+    def update(self, dt: float):
+        # A transition requested during the last step is applied before simulating
+        self.apply_transition()
         if self.sceneStack:
-            self.sceneStack[-1].render(dt)
+            self.sceneStack[-1].update(dt)
+
+    def render(self, alpha: float) -> Optional[list]:
+        rects = self.sceneStack[-1].render(alpha) if self.sceneStack else None
+        # Scenes without dirty rects update the whole screen
+        screen = self.display.get_width() * self.display.get_height()
+        self.profiler.redrawn = 1.0 if rects is None else sum(rect.width * rect.height for rect in rects) / screen
+        return rects
         # if self.start:
         #     self.fade()
 
+    def process_input(self, events: list[pygame.event.Event], snapshot: Optional[dict] = None):
+        """
+        Take the frame's input snapshot, or restore a recorded one, route its events,
+        then run the top scene's per frame input once.
+        """
+        if snapshot is None:
+            self.input.process_input(events)
+        else:
+            self.input.restore(snapshot)
+        for event in self.input.events:
+            self.event_loop(event)
+        if self.sceneStack:
+            self.sceneStack[-1].handle_input(self.input)
+
     def event_loop(self, event: pygame.event.Event):
+        self.profiler.handle_event(event)
         if self.sceneStack:
             self.sceneStack[-1].event_loop(event)
 
+    def scene_name(self) -> str:
+        return self.sceneStack[-1].name if self.sceneStack else ""
+
+    def damage(self, rect: pygame.Rect):
+        if self.sceneStack and self.sceneStack[-1].renderer:
+            self.sceneStack[-1].renderer.damage(rect)
+
 
 class Menu(Scene):
     def __init__(self, display: pygame.surface, data: dict, manager: SceneManager):
         super().__init__(display, None, "main_menu", data, manager)
-        self.buttons = pygame.sprite.Group()
         self.buttonsData = self.data["buttons"]
-        Button((self.display.get_width() / 2, 400), "Play", "orange", self.buttons)
-        Button((self.display.get_width() / 2, 500), "Options", "orange", self.buttons)
-        Button((self.display.get_width() / 2, 600), "Exit", "orange", self.buttons)
+        x = self.display.get_width() / 2
+        if self.manager.load_save():
+            self.ui.add(Button((x, 300), "Continue", "orange"), self.click)
+        self.ui.add(Button((x, 400), "Play", "orange"), self.click)
+        self.ui.add(Button((x, 500), "Options", "orange"), self.click)
+        self.ui.add(Button((x, 600), "Exit", "orange"), self.click)
+        self.buttons = self.ui.widgets
+        self.prefetched = False
+
+    def subscribe_events(self) -> None:
+        # The buttons are retained widgets, the UI layer changes their state on mouse events
+        self.ui = UILayer(self.display, BLUE, self.router)
+        self.renderer = self.ui.renderer
+
+    def click(self, button: Button) -> None:
+        self.manager.enter_scene(self.buttonsData[button.text]["action"])
+
+    def handle_input(self, input_stream: InputStream) -> None:
+        ...
 
-    def event_loop(self, event: pygame.event.Event) -> None:
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            for button in self.buttons:
-                button: Button
-                if button.hover():
-                    self.manager.enter_scene(self.buttonsData[button.text]["action"])
-
-    def render(self, dt: float) -> None:
-        self.display.fill(BLUE)
-        self.buttons.update(dt)
-        self.buttons.draw(self.display)
+    def update(self, dt: float) -> None:
+        ...
+
+    def render(self, alpha: float) -> Optional[list]:
+        with self.manager.profiler.phase("draw"):
+            rects = self.ui.draw()
+        if not self.prefetched:
+            # Once the first frame is drawn, load the scenes the menu leads to in the background
+            self.prefetched = True
+            for button in self.buttonsData.values():
+                if button["action"] not in ("exit", "continue"):
+                    self.manager.prefetch(button["action"])
+        return rects
@@ -0,0 +1,70 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Optional, TYPE_CHECKING
+from settings import get_setting, SCENE_POOL_SIZE, SCENE_POOL_MB
+
+if TYPE_CHECKING:
+    from scene import Scene
+
+
+class ScenePool:
+    """
+    Keeps recently exited scenes suspended by name so entering them again only reattaches the player.
+    The least recently exited scene is dropped once the pool holds too many scenes or too many bytes.
+    """
+
+    def __init__(self, max_scenes: Optional[int] = None, max_bytes: Optional[int] = None):
+        if max_scenes is None:
+            max_scenes = int(get_setting("performance", "scene_pool_size", SCENE_POOL_SIZE))
+        if max_bytes is None:
+            max_bytes = int(get_setting("performance", "scene_pool_mb", SCENE_POOL_MB)) * 1024 * 1024
+        self.maxScenes = max_scenes
+        self.maxBytes = max_bytes
+        self.scenes: OrderedDict[str, Scene] = OrderedDict()
+        self.sizes: dict[str, int] = {}
+        self.size = 0
+        # Milliseconds taken to enter a scene built from scratch and one taken from the pool
+        self.coldTimes: list[float] = []
+        self.warmTimes: list[float] = []
+        # Scenes dropped to stay within the budget
+        self.evictions = 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.scenes
+
+    def put(self, scene: Scene):
+        self.discard(scene.name)
+        scene.suspend()
+        size = scene.memory_estimate()
+        self.scenes[scene.name] = scene
+        self.sizes[scene.name] = size
+        self.size += size
+        while self.scenes and (len(self.scenes) > self.maxScenes or self.size > self.maxBytes):
+            self.discard(next(iter(self.scenes)))
+            self.evictions += 1
+
+    def take(self, name: str) -> Optional[Scene]:
+        scene = self.scenes.pop(name, None)
+        if scene is not None:
+            self.size -= self.sizes.pop(name)
+        return scene
+
+    def discard(self, name: str):
+        scene = self.take(name)
+        if scene is not None:
+            scene.close()
+
+    def record(self, warm: bool, milliseconds: float):
+        (self.warmTimes if warm else self.coldTimes).append(milliseconds)
+
+    def report(self) -> dict:
+        def average(times: list) -> Optional[float]:
+            return sum(times) / len(times) if times else None
+
+        return {"scenes": list(self.scenes.keys()), "bytes": self.size, "hits": len(self.warmTimes),
+                "misses": len(self.coldTimes), "evictions": self.evictions,
+                "cold_ms": average(self.coldTimes), "warm_ms": average(self.warmTimes)}
+
+    def summary(self) -> str:
+        return (f"{len(self.warmTimes)} hits {len(self.coldTimes)} misses {self.evictions} evicted "
+                f"{len(self.scenes)} kept {self.size / 2 ** 20:.0f}MB")
@@ -1,6 +1,7 @@
 from configparser import ConfigParser
 from os import getlogin
 from os.path import realpath, exists
+from typing import Optional
 
 # ---------- Default Values ----------
 # Settings path
@@ -12,13 +13,28 @@ SETTINGS_PATH = SETTINGS_FILE_NAME
 WIDTH = 1280
 HEIGHT = 720
 
+# Performance
+SCENE_POOL_SIZE = 3
+SCENE_POOL_MB = 256
+DIRTY_RECTS = True
+FPS_CAP = 60
+SIMULATION_RATE = 60
+RENDER_SCALE = 1.0
+ADAPTIVE_SCALE = False
+
+
+# Parsed once, every get_setting reads from it
+settings: Optional[ConfigParser] = None
 
-def load_settings():
-    if not exists(SETTINGS_PATH):
-        create_settings_file()
-    config = ConfigParser()
-    config.read(SETTINGS_PATH)
-    return config
+
+def load_settings() -> ConfigParser:
+    global settings
+    if settings is None:
+        if not exists(SETTINGS_PATH):
+            create_settings_file()
+        settings = ConfigParser()
+        settings.read(SETTINGS_PATH)
+    return settings
 
 
 def create_settings_file():
@@ -27,12 +43,18 @@ def create_settings_file():
     config.add_section("display")
     config.set("display", "width", str(WIDTH))
     config.set("display", "height", str(HEIGHT))
+    config.add_section("performance")
+    config.set("performance", "scene_pool_size", str(SCENE_POOL_SIZE))
+    config.set("performance", "scene_pool_mb", str(SCENE_POOL_MB))
+    config.set("performance", "dirty_rects", str(DIRTY_RECTS).lower())
+    config.set("performance", "fps_cap", str(FPS_CAP))
+    config.set("performance", "simulation_rate", str(SIMULATION_RATE))
+    config.set("performance", "render_scale", str(RENDER_SCALE))
+    config.set("performance", "adaptive_scale", str(ADAPTIVE_SCALE).lower())
 
     with open('config.ini', 'w') as file:
         config.write(file)
 
 
-def get_setting(section: str, key):
-    config = ConfigParser()
-    config.read(SETTINGS_PATH)
-    return config.get(section, key)
+def get_setting(section: str, key, fallback=None):
+    return load_settings().get(section, key, fallback=fallback)
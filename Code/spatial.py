@@ -0,0 +1,180 @@
+from __future__ import annotations
+import pygame
+from typing import Callable, Hashable, Iterator, Optional
+from constants import TILE_SIZE
+from tiles import TileLayer
+
+
+class SpatialGrid:
+    """
+    Uniform grid mapping cells to the items whose rect overlaps them.
+    Large items are stored in every cell they cover, so a query only has to
+    look at the cells under the queried rect.
+    """
+
+    def __init__(self, cell_size: int = TILE_SIZE * 4):
+        self.cellSize = cell_size
+        self.cells: dict[tuple[int, int], set] = {}
+        self.ranges: dict[Hashable, tuple[int, int, int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ranges)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self.ranges
+
+    def cell_range(self, rect: pygame.Rect) -> tuple[int, int, int, int]:
+        size = self.cellSize
+        return (rect.left // size, rect.top // size,
+                max(rect.left, rect.right - 1) // size, max(rect.top, rect.bottom - 1) // size)
+
+    def cells_in(self, cell_range: tuple[int, int, int, int]) -> Iterator[tuple[int, int]]:
+        left, top, right, bottom = cell_range
+        for y in range(top, bottom + 1):
+            for x in range(left, right + 1):
+                yield x, y
+
+    def insert(self, item: Hashable, rect: pygame.Rect):
+        if item in self.ranges:
+            self.remove(item)
+        cell_range = self.cell_range(rect)
+        self.ranges[item] = cell_range
+        for cell in self.cells_in(cell_range):
+            self.cells.setdefault(cell, set()).add(item)
+
+    def remove(self, item: Hashable):
+        cell_range = self.ranges.pop(item, None)
+        if cell_range is None:
+            return
+        for cell in self.cells_in(cell_range):
+            bucket = self.cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[cell]
+
+    def move(self, item: Hashable, rect: pygame.Rect):
+        """
+        Update an item after its rect changed, touching the cells only when it crossed a cell border.
+        """
+        if self.ranges.get(item) != self.cell_range(rect):
+            self.insert(item, rect)
+
+    def query(self, rect: pygame.Rect) -> set:
+        """
+        Items stored in the cells under rect. Candidates still need an exact rect test.
+        """
+        found = set()
+        cells = self.cells
+        for cell in self.cells_in(self.cell_range(rect)):
+            bucket = cells.get(cell)
+            if bucket:
+                found |= bucket
+        return found
+
+    def clear(self):
+        self.cells.clear()
+        self.ranges.clear()
+
+
+class CollisionGroup(pygame.sprite.Group):
+    """
+    Sprite group that keeps a SpatialGrid over one rect attribute of its sprites,
+    "hitbox" for collision sprites or "rect" for interaction triggers.
+    Queries return candidates in insertion order, the order the group iterates in.
+    Tile layers can be added as a whole, each taking one serial per cell so their tiles keep the order
+    per tile sprites would have had.
+    Listeners are told the area of every static change, a sprite or layer added or removed. Sprites moving
+    through refresh are not reported.
+    """
+
+    def __init__(self, box: str = "hitbox", cell_size: int = TILE_SIZE * 2, *sprites: pygame.sprite.Sprite):
+        self.box = box
+        self.grid = SpatialGrid(cell_size)
+        self.serials: dict[pygame.sprite.Sprite, int] = {}
+        self.serial = 0
+        # Sprites are indexed on the next query, once their rects exist
+        self.pending: list[pygame.sprite.Sprite] = []
+        self.layers: list[tuple[int, TileLayer]] = []
+        self.listeners: list[Callable[[pygame.Rect], None]] = []
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite: pygame.sprite.Sprite, layer=None):
+        super().add_internal(sprite)
+        self.serials[sprite] = self.serial
+        self.serial += 1
+        self.pending.append(sprite)
+
+    def remove_internal(self, sprite: pygame.sprite.Sprite):
+        super().remove_internal(sprite)
+        del self.serials[sprite]
+        self.grid.remove(sprite)
+        self.changed(getattr(sprite, self.box))
+
+    def flush(self):
+        for sprite in self.pending:
+            if sprite in self.serials:
+                self.grid.insert(sprite, getattr(sprite, self.box))
+                self.changed(getattr(sprite, self.box))
+        self.pending.clear()
+
+    def changed(self, rect: pygame.Rect):
+        for listener in self.listeners:
+            listener(rect)
+
+    def refresh(self, sprite: pygame.sprite.Sprite):
+        """
+        Re-index a sprite after its box moved.
+        """
+        if sprite in self.serials and sprite not in self.pending:
+            self.grid.move(sprite, getattr(sprite, self.box))
+
+    def nearby(self, rect: pygame.Rect) -> list:
+        """
+        Sprites in the grid cells under rect, in group order.
+        """
+        self.flush()
+        return sorted(self.grid.query(rect), key=self.serials.__getitem__)
+
+    def colliding(self, rect: pygame.Rect) -> list:
+        """
+        Sprites whose box collides with rect, in group order, like pygame.sprite.spritecollide.
+        """
+        box = self.box
+        return [sprite for sprite in self.nearby(rect) if getattr(sprite, box).colliderect(rect)]
+
+    def add_layer(self, layer: TileLayer):
+        self.layers.append((self.serial, layer))
+        self.serial += layer.width * layer.height
+        self.changed(layer.bounds())
+
+    def remove_layer(self, layer: TileLayer):
+        self.layers = [(base, added) for base, added in self.layers if added is not layer]
+        self.changed(layer.bounds())
+
+    def next_collision(self, rect: pygame.Rect, after: int = -1) -> Optional[tuple[int, pygame.Rect]]:
+        """
+        (serial, box) of the first sprite or layer tile after the given serial, in group order,
+        whose box collides with rect.
+        """
+        self.flush()
+        box = self.box
+        serials = self.serials
+        found = None
+        found_serial = 0
+        for sprite in self.grid.query(rect):
+            serial = serials[sprite]
+            if serial > after and (found is None or serial < found_serial):
+                sprite_box = getattr(sprite, box)
+                if sprite_box.colliderect(rect):
+                    found = sprite_box
+                    found_serial = serial
+        for base, layer in self.layers:
+            # Tiles come in cell order, so the first one past after is the layer's earliest
+            for index, tile_rect in layer.colliding(rect):
+                serial = base + index
+                if serial > after:
+                    if found is None or serial < found_serial:
+                        found = tile_rect
+                        found_serial = serial
+                    break
+        return None if found is None else (found_serial, found)
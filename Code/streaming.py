@@ -0,0 +1,121 @@
+from __future__ import annotations
+import pygame
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional
+from chunks import CHUNK_TILES
+from mapbundle import MapBundle, BundleObject
+from tiles import TileLayer
+
+# Chunks loaded around the ones on screen, and how much further a chunk has to be before it is unloaded
+STREAM_RADIUS = 1
+UNLOAD_MARGIN = 1
+
+
+class ChunkData:
+    """
+    Everything one chunk adds to a scene, built off the main thread.
+    """
+
+    def __init__(self, key: tuple[int, int]):
+        self.key = key
+        # Static layers baked into one surface per layer, as (position, surface, z)
+        self.baked: list[tuple[tuple, pygame.Surface, int]] = []
+        # Tiles that stay sprites, on the actors' z or animated, as (position, surface, z)
+        self.tiles: list[tuple[tuple, pygame.Surface, int]] = []
+        self.layers: list[TileLayer] = []
+        self.objects: list[BundleObject] = []
+
+
+class ChunkStreamer:
+    """
+    Builds the chunks of a compiled map on a worker thread. Layer gids are read straight from the mapped
+    bundle, so only the chunks that are requested are ever held in memory.
+    """
+
+    def __init__(self, bundle: MapBundle, layers: dict, main_index: int, chunk_tiles: int = CHUNK_TILES):
+        self.bundle = bundle
+        self.layersData = layers
+        self.mainIndex = main_index
+        self.chunkTiles = chunk_tiles
+        self.tileSize = bundle.tilewidth
+        self.columns = -(-bundle.width // chunk_tiles)
+        self.rows = -(-bundle.height // chunk_tiles)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chunk-streamer")
+        self.pending: dict[tuple[int, int], Future] = {}
+        # Map objects are few, they are bucketed by chunk up front
+        self.objects: dict[tuple[int, int], list[BundleObject]] = {}
+        for obj in bundle.objects:
+            self.objects.setdefault(self.chunk_of(obj.x, obj.y), []).append(obj)
+
+    def chunk_of(self, x: float, y: float) -> tuple[int, int]:
+        size = self.chunkTiles * self.tileSize
+        return int(x // size), int(y // size)
+
+    def chunks_around(self, rect: pygame.Rect, radius: int) -> set[tuple[int, int]]:
+        """
+        Chunks under rect plus radius chunks around them, inside the map.
+        """
+        left, top = self.chunk_of(rect.left, rect.top)
+        right, bottom = self.chunk_of(rect.right - 1, rect.bottom - 1)
+        return {(x, y) for y in range(max(0, top - radius), min(self.rows, bottom + radius + 1))
+                for x in range(max(0, left - radius), min(self.columns, right + radius + 1))}
+
+    def request(self, key: tuple[int, int]):
+        if key not in self.pending:
+            self.pending[key] = self.executor.submit(self.build, key)
+
+    def cancel(self, key: tuple[int, int]):
+        future = self.pending.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def take(self, key: tuple[int, int], wait: bool = False) -> Optional[ChunkData]:
+        """
+        A requested chunk once it is built, or right away waiting for it.
+        """
+        future = self.pending.get(key)
+        if future is None or not (wait or future.done()):
+            return None
+        del self.pending[key]
+        return future.result()
+
+    def build(self, key: tuple[int, int]) -> ChunkData:
+        chunk = ChunkData(key)
+        size = self.tileSize
+        x0, y0 = key[0] * self.chunkTiles, key[1] * self.chunkTiles
+        width = min(self.chunkTiles, self.bundle.width - x0)
+        height = min(self.chunkTiles, self.bundle.height - y0)
+        images = self.bundle.images
+        for layer in self.bundle.visible_layers:
+            layer_data = self.layersData[layer.name]
+            z = layer_data["index"]
+            tile_layer = TileLayer(layer.name, width, height, z, size, (x0, y0))
+            for y in range(height):
+                start = (y0 + y) * layer.width + x0
+                for x, gid in enumerate(layer.gids[start:start + width]):
+                    if gid and images[gid]:
+                        tile_layer.set(x, y, gid, images[gid])
+            if not tile_layer.surfaces:
+                continue
+            if layer_data["collision"]:
+                chunk.layers.append(tile_layer)
+
+            tiles = [((x * size, y * size), surface) for x, y, surface in tile_layer.tiles()]
+            # Same rule as the chunk cache: actors' z stays y-sorted with them, animated tiles are not baked
+            if z == self.mainIndex or self.bundle.animated.intersection(tile_layer.surfaces):
+                chunk.tiles.extend((position, surface, z) for position, surface in tiles)
+                continue
+            tiles.sort(key=lambda tile: tile[0][1] + tile[1].get_height() / 2)
+            rects = [surface.get_rect(topleft=position) for position, surface in tiles]
+            bounds = rects[0].unionall(rects)
+            baked = pygame.Surface(bounds.size, pygame.SRCALPHA)
+            baked.blits([(surface, (x - bounds.x, y - bounds.y)) for (x, y), surface in tiles], doreturn=False)
+            chunk.baked.append((bounds.topleft, baked, z))
+        chunk.objects = self.objects.get(key, [])
+        return chunk
+
+    def close(self):
+        for key in list(self.pending):
+            self.cancel(key)
+        # A chunk being built still reads the bundle, wait for it
+        self.executor.shutdown()
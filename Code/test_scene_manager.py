@@ -0,0 +1,63 @@
+"""
+Scene transitions of SceneManager on generated scenes. Run from the Code directory.
+
+python -m unittest test_scene_manager
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import random
+import shutil
+import tempfile
+import unittest
+from benchmark import generate_scene
+from save import SaveManager, PendingScene, AUTOSAVE_SLOT, SAVE_VERSION, save_path, write_save
+from scene import SceneManager
+
+
+class ContinueTest(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+        self.display = pygame.display.set_mode((320, 240))
+        self.directory = tempfile.mkdtemp(prefix="tt_test_")
+        rng = random.Random(0)
+        for name in ("outer", "inner"):
+            generate_scene(self.directory, name, 64, 8, rng)
+        saves_path = os.path.join(self.directory, "Saves")
+        write_save(save_path(AUTOSAVE_SLOT, saves_path),
+                   {"version": SAVE_VERSION, "stack": ["outer", "inner"], "inventory": {},
+                    "position": [64, 64], "xp": 0, "level": 1})
+        self.manager = SceneManager(self.display, self.directory, SaveManager(saves_path))
+
+    def tearDown(self):
+        self.manager.saves.close()
+        pygame.quit()
+        shutil.rmtree(self.directory)
+
+    def stack(self) -> list[str]:
+        return [scene.name for scene in self.manager.sceneStack]
+
+    def test_continue_restores_the_stack(self):
+        self.manager.enter_scene("continue")
+        self.manager.update(0)
+        self.assertEqual(self.stack(), ["outer", "inner"])
+        self.assertIsInstance(self.manager.sceneStack[0], PendingScene)
+
+    def test_exit_after_continue_returns_to_the_scene_below(self):
+        self.manager.enter_scene("continue")
+        self.manager.update(0)
+        self.manager.exit_level()
+        self.manager.update(0)
+        self.assertEqual(self.stack(), ["outer"])
+        self.assertNotIsInstance(self.manager.sceneStack[0], PendingScene)
+
+    def test_exit_requests_quit(self):
+        self.manager.enter_scene("exit")
+        self.manager.update(0)
+        self.assertTrue(self.manager.quitRequested)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import pygame
+from array import array
+from typing import Iterator, Optional
+from constants import TILE_SIZE
+
+
+class TileLayer:
+    """
+    Compact storage for a map tile layer: a flat row major array of gids and a table of the tile surfaces
+    shared by every cell with the same gid. Tiles are anchored by their top left corner like Tile sprites,
+    so tiles larger than a cell overhang to the right and down.
+    A layer can cover only part of a map, from origin in tiles, cell coordinates are then local to it.
+    """
+
+    def __init__(self, name: str, width: int, height: int, z: int, tile_size: int = TILE_SIZE,
+                 origin: tuple[int, int] = (0, 0)):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.origin = origin
+        self.z = z
+        self.tileSize = tile_size
+        self.gids = array("I", bytes(4 * width * height))
+        self.surfaces: dict[int, pygame.Surface] = {}
+        # Extra cells to look at to the left and above a query for tiles overhanging into it
+        self.overhang = (0, 0)
+
+    @classmethod
+    def from_layer(cls, layer, z: int, tile_size: int = TILE_SIZE) -> TileLayer:
+        """
+        Build from a pytmx TiledTileLayer or a BundleTileLayer.
+        """
+        tile_layer = cls(layer.name, layer.width, layer.height, z, tile_size)
+        images = layer.parent.images
+        for x, y, gid in layer.iter_data():
+            if gid and images[gid]:
+                tile_layer.set(x, y, gid, images[gid])
+        return tile_layer
+
+    def __len__(self) -> int:
+        return sum(1 for gid in self.gids if gid)
+
+    def set(self, x: int, y: int, gid: int, surface: Optional[pygame.Surface] = None):
+        self.gids[y * self.width + x] = gid
+        if gid and gid not in self.surfaces:
+            self.surfaces[gid] = surface
+            size = self.tileSize
+            self.overhang = (max(self.overhang[0], -(-(surface.get_width() - size) // size)),
+                             max(self.overhang[1], -(-(surface.get_height() - size) // size)))
+
+    def gid_at(self, x: int, y: int) -> int:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.gids[y * self.width + x]
+        return 0
+
+    def bounds(self) -> pygame.Rect:
+        """
+        Area the layer's tiles can cover, overhang included.
+        """
+        size = self.tileSize
+        return pygame.Rect(self.origin[0] * size, self.origin[1] * size,
+                           (self.width + self.overhang[0]) * size, (self.height + self.overhang[1]) * size)
+
+    def tile_rect(self, x: int, y: int) -> pygame.Rect:
+        return self.surfaces[self.gid_at(x, y)].get_rect(topleft=((self.origin[0] + x) * self.tileSize,
+                                                                  (self.origin[1] + y) * self.tileSize))
+
+    def tiles(self) -> Iterator[tuple[int, int, pygame.Surface]]:
+        """
+        Map cell coordinates and surface of every tile.
+        """
+        width = self.width
+        origin_x, origin_y = self.origin
+        surfaces = self.surfaces
+        for index, gid in enumerate(self.gids):
+            if gid:
+                yield origin_x + index % width, origin_y + index // width, surfaces[gid]
+
+    def colliding(self, rect: pygame.Rect) -> Iterator[tuple[int, pygame.Rect]]:
+        """
+        (cell index, tile rect) of the tiles colliding with rect, looking only at the cells under it.
+        """
+        size = self.tileSize
+        origin_x, origin_y = self.origin
+        left = max(0, rect.left // size - origin_x - self.overhang[0])
+        top = max(0, rect.top // size - origin_y - self.overhang[1])
+        right = min(self.width - 1, max(rect.left, rect.right - 1) // size - origin_x)
+        bottom = min(self.height - 1, max(rect.top, rect.bottom - 1) // size - origin_y)
+        gids = self.gids
+        surfaces = self.surfaces
+        for y in range(top, bottom + 1):
+            row = y * self.width
+            for x in range(left, right + 1):
+                gid = gids[row + x]
+                if gid:
+                    tile_rect = surfaces[gid].get_rect(topleft=((origin_x + x) * size, (origin_y + y) * size))
+                    if tile_rect.colliderect(rect):
+                        yield row + x, tile_rect
@@ -0,0 +1,87 @@
+from __future__ import annotations
+import pygame
+from typing import Callable, Optional, Union
+from dirty import DirtyRenderer
+from input_stream import EventRouter
+
+# Visual states every widget pre-composites
+WIDGET_STATES = ("normal", "hover", "pressed")
+
+
+class Widget(pygame.sprite.Sprite):
+    """
+    Retained mode widget. Each state is composited once up front, mouse events only swap the image.
+    on_click runs when the left button is released over the widget it was pressed on.
+    """
+
+    def __init__(self, position: tuple, states: dict[str, pygame.Surface], *groups: pygame.sprite.Group):
+        super().__init__(*groups)
+        self.states = states
+        self.state = "normal"
+        self.image = states["normal"]
+        self.rect = self.image.get_rect(center=position)
+        self.on_click: Optional[Callable[[Widget], None]] = None
+        self.dirty = True
+
+    def set_state(self, state: str):
+        if state != self.state:
+            self.state = state
+            self.image = self.states[state]
+            self.dirty = True
+
+    def mouse_motion(self, event: pygame.event.Event):
+        if self.state != "pressed":
+            self.set_state("hover" if self.rect.collidepoint(event.pos) else "normal")
+
+    def mouse_down(self, event: pygame.event.Event):
+        if event.button == 1 and self.rect.collidepoint(event.pos):
+            self.set_state("pressed")
+
+    def mouse_up(self, event: pygame.event.Event):
+        if event.button != 1 or self.state != "pressed":
+            return
+        inside = self.rect.collidepoint(event.pos)
+        self.set_state("hover" if inside else "normal")
+        if inside and self.on_click:
+            self.on_click(self)
+
+
+class UILayer:
+    """
+    The widgets of a scene. They are driven by the scene's router and the layer is only redrawn,
+    through a dirty rect renderer, on frames where a widget changed state.
+    """
+
+    def __init__(self, display: pygame.Surface, background: Union[str, tuple, pygame.Surface], router: EventRouter):
+        self.widgets = pygame.sprite.Group()
+        self.renderer = DirtyRenderer(display, background)
+        router.subscribe(pygame.MOUSEMOTION, self.mouse_motion)
+        router.subscribe(pygame.MOUSEBUTTONDOWN, self.mouse_down)
+        router.subscribe(pygame.MOUSEBUTTONUP, self.mouse_up)
+
+    def add(self, widget: Widget, on_click: Optional[Callable[[Widget], None]] = None) -> Widget:
+        widget.on_click = on_click
+        self.widgets.add(widget)
+        return widget
+
+    def mouse_motion(self, event: pygame.event.Event):
+        for widget in self.widgets:
+            widget.mouse_motion(event)
+
+    def mouse_down(self, event: pygame.event.Event):
+        for widget in self.widgets:
+            widget.mouse_down(event)
+
+    def mouse_up(self, event: pygame.event.Event):
+        # Copied, a click can change scene and empty the layer
+        for widget in self.widgets.sprites():
+            widget.mouse_up(event)
+
+    def draw(self) -> list[pygame.Rect]:
+        widgets = self.widgets.sprites()
+        renderer = self.renderer
+        if not renderer.full and not renderer.damaged and not any(widget.dirty for widget in widgets):
+            return []
+        for widget in widgets:
+            widget.dirty = False
+        return renderer.draw(widgets)